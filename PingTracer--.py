@@ -1,17 +1,20 @@
 import tkinter as tk
 import threading
 import queue
+import collections
+import itertools
 import time # Added for timestamps
+import logging
+import math
+from functools import lru_cache, partial
 
-try:
-    from PIL import Image, ImageDraw, ImageTk
-except ImportError:
-    print("Pillow library not found. Please install it: pip install Pillow")
-    exit()
+# Debug tracing goes through logging so that, at the default WARNING level, hot paths
+# (per ping / per draw) skip the message formatting and the stdout write entirely
+log = logging.getLogger("pingtracer")
 
 # Assuming config.py and traceroute_tool.py exist (in the same directory) and work as expected
-from config import Config
-from traceroute_tool import trace_route
+from config import load_config
+from traceroute_tool import iter_hops
 from ping3 import ping
 
 
@@ -19,11 +22,11 @@ from ping3 import ping
 def interpolate(a, b, t):
     return a + (b - a) * t
 
-def interpolate_color_tuple(color1, color2, t):
-    r = int(interpolate(color1[0], color2[0], t))
-    g = int(interpolate(color1[1], color2[1], t))
-    b = int(interpolate(color1[2], color2[2], t))
-    return (r, g, b)
+@lru_cache(maxsize=512)
+def gradient_color(color1, color2, t256):
+    """Interpolates between two (r, g, b) colors in integers, for a position quantized to 0..255.
+    A gradient only has 256 distinct colors, so results are cached instead of recomputed per ping."""
+    return tuple(c1 + (c2 - c1) * t256 // 255 for c1, c2 in zip(color1, color2))
 
 # define base colors
 GREEN = (0, 255, 0)
@@ -32,17 +35,140 @@ RED = (255, 0, 0)
 BLUE = (0, 0, 255)
 BLACK = (0, 0, 0)
 
+@lru_cache(maxsize=1024)
+def hex_color(color):
+    """Formats an (r, g, b) tuple as the '#rrggbb' string Tk's PhotoImage.put takes."""
+    return f"#{color[0]:02x}{color[1]:02x}{color[2]:02x}"
+
+BLACK_HEX = hex_color(BLACK)
+
+# Attempts without a single successful ping after which a hop is considered for removal
+UNRESPONSIVE_AFTER = 10
+
+# Minimum time between two refreshes of a graph's info label (~5 Hz)
+INFO_INTERVAL_MS = 200
+
+# Upper bound on PingRunner threads per host. Enough to keep a ping in flight for every round that
+# overlaps within the timeout at usual settings (1 s timeout, up to 8 pings/s); beyond that a
+# timing-out host would need hundreds of blocked threads, so its rounds are skipped instead
+# (see schedule_next_ping_round).
+MAX_WORKERS_PER_HOST = 8
+
+# Results waiting for the Tk thread above which PingRunners drop new ones: a few rounds for every hop
+# of a full-length (30 hop) trace. Fixed per run since hops are added while the trace is running.
+MAX_PENDING_RESULTS = 8 * 30
+
+# Pings kept per graph (grown to the widest canvas seen), and round timestamps kept by the app
+PING_HISTORY = 1024
+
+# Latency histogram: log-linear bins with two significant digits per decade (10..99 x 10^e),
+# covering 0.01 ms up to 99999 ms. Bin 0 collects anything faster than HIST_MIN_MS.
+HIST_MIN_EXP = -2
+HIST_MAX_EXP = 4
+HIST_MIN_MS = 10.0 ** HIST_MIN_EXP
+HIST_BINS = (HIST_MAX_EXP - HIST_MIN_EXP + 1) * 90 + 1
+
+def hist_bin(value):
+    """Maps a latency in ms to its histogram bin index."""
+    if value < HIST_MIN_MS:
+        return 0
+    e = math.floor(math.log10(value))
+    m = min(99, max(10, int(value / 10.0 ** (e - 1)))) # Two significant digits, guard float rounding
+    return min(HIST_BINS - 1, (e - HIST_MIN_EXP) * 90 + (m - 10) + 1)
+
+def hist_bin_value(idx):
+    """Returns the representative latency (bin midpoint) of histogram bin 'idx'."""
+    if idx == 0:
+        return 0.0
+    e, m = divmod(idx - 1, 90)
+    return (m + 10.5) * 10.0 ** (e + HIST_MIN_EXP - 1)
+
+def hist_percentiles(hist, total, quantiles):
+    """Returns the latency at each of the (ascending) 'quantiles' from a histogram holding 'total' values."""
+    results = []
+    targets = iter(quantiles)
+    q = next(targets, None)
+    seen = 0
+    for idx, count in enumerate(hist):
+        if not count:
+            continue
+        seen += count
+        while q is not None and seen >= q * total:
+            results.append(hist_bin_value(idx))
+            q = next(targets, None)
+        if q is None:
+            break
+    return results
+
+def write_column(photo, height, x, color, lh):
+    """Writes column x of a Tk PhotoImage: black above the line, 'color' for the bottom 'lh' rows.
+    Each run is one put of a single color tiled over a 1-pixel-wide rectangle (filled by Tk, no per-pixel Python work)."""
+    y0 = height - lh
+    if y0 > 0:
+        photo.put(BLACK_HEX, to=(x, 0, x + 1, y0))
+    photo.put(color, to=(x, y0, x + 1, height))
+
+def write_columns(photo, height, styles):
+    """Writes columns 0..len(styles)-1 of a Tk PhotoImage in a single put, one (color, line height) per column.
+    Row y only differs from row y-1 in the columns whose line starts at y, so rows are built incrementally
+    and each is one str.join instead of a Python loop over its pixels."""
+    if not styles:
+        return
+    starts = [[] for _ in range(height)] # y -> columns whose line starts on row y
+    for x, (color, lh) in enumerate(styles):
+        starts[height - lh].append((x, color))
+    row = [BLACK_HEX] * len(styles)
+    rows = []
+    for y in range(height):
+        for x, color in starts[y]:
+            row[x] = color
+        rows.append("{" + " ".join(row) + "}")
+    photo.put(" ".join(rows), to=(0, 0))
+
+def ping_style(ping_value, h, bad_threshold, so_bad_threshold):
+    """Returns the (color, line height) used to draw a successful ping of 'ping_value' ms on a graph 'h' pixels high."""
+    if ping_value < 1:
+        lh = 1
+        col = GREEN
+    elif ping_value < bad_threshold:
+        f = ping_value / bad_threshold
+        lh = max(1, int(interpolate(1, h * 0.5, f)))
+        col = gradient_color(GREEN, YELLOW, int(f * 255))
+    elif ping_value < so_bad_threshold:
+        f = (ping_value - bad_threshold) / (so_bad_threshold - bad_threshold)
+        lh = int(interpolate(h * 0.5, h, f))
+        col = gradient_color(YELLOW, RED, int(f * 255))
+    else: # >= so_bad_threshold
+        lh = h
+        col = RED
+    lh = min(h, max(1, int(lh))) # Ensure line height is within bounds and integer
+    return col, lh
+
+# Whole milliseconds covered by a column style table; slower pings are styled on the fly
+STYLE_TABLE_MS = 1024
+
+@lru_cache(maxsize=16)
+def column_style_table(h, bad_threshold, so_bad_threshold):
+    """Returns the ('#rrggbb' color, line height) of each whole millisecond below STYLE_TABLE_MS, for a graph 'h' pixels high.
+    The table only depends on its arguments, so graphs of the same height share one instead of each building their own."""
+    table = []
+    for ms in range(STYLE_TABLE_MS):
+        col, lh = ping_style(ms, h, bad_threshold, so_bad_threshold)
+        table.append((hex_color(col), lh))
+    return tuple(table)
+
 class PingGraph(tk.Frame):
     def __init__(
         self, master, app, host_ip, host_hostname=None, **kwargs
     ):
-        print(f"[INIT] Creating PingGraph for host: {host_ip} ({host_hostname})")
+        log.debug("[INIT] Creating PingGraph for host: %s (%s)", host_ip, host_hostname)
         super().__init__(master, bg="#222222", **kwargs)
         self.app = app # Store reference to the main app
         self.host_ip = host_ip
         self.host_hostname = host_hostname
 
-        self.pings = []  # stores all historical ping values for this host (None, False, or float ms)
+        self.pings = collections.deque(maxlen=PING_HISTORY)  # recent ping values for this host (None, False, or float ms), at least one canvas width
+        self.ping_times = collections.deque(maxlen=PING_HISTORY) # wall-clock time of the round each entry of 'pings' belongs to
 
         # --- Ping Statistics Attributes ---
         self.stat_count = 0         # Number of successful pings
@@ -53,16 +179,32 @@ class PingGraph(tk.Frame):
         self.stat_last_valid_ping = None # For jitter calculation
         self.stat_jitter_sum = 0.0
         self.stat_jitter_count = 0  # Number of jitter values calculated
+        self.stat_hist = [0] * HIST_BINS # Successful ping counts per latency bin, for percentiles
         self.label_font_normal = ("TkDefaultFont", 8)
         self.label_font_tiny = ("TkDefaultFont", 4) # For compact mode option (terrible idea but i will choose to leave it for now)
 
         # image buffer attributes (image holds a graph)
-        self.pil_image = None # PIL Image object
-        self.photo_image = None
+        self.photo_image = None # Tk PhotoImage holding the graph; columns are drawn into it directly with put()
         self.image_on_canvas = None # ID of the image item on the canvas
+        self.image_on_canvas_wrap = None # ID of the second item showing the same image, for the wrapped part of the ring
         self.current_width = 0 # Tracks the canvas width for buffer size
         self.current_height = 3 # Start with a minimal height, packing will expand it
+        self._known_canvas_size = None # (width, height) from the last <Configure>, None until the first one
         self.current_buffer_index = 0 # Tracks the next drawing position in the buffer (horizontal position of next ping line on the graph buffer)
+        # Once the buffer is full it is used as a ring: new pings overwrite the oldest column (col_head)
+        # instead of shifting the whole frame. The two canvas items are offset so the oldest column
+        # still appears at the left edge.
+        self.col_head = 0 # Buffer column holding the oldest visible ping (0 until the buffer wraps)
+        self._shown_head = 0 # col_head the canvas items are currently positioned for
+        self._lut = () # ms -> ('#rrggbb' color, line height), see _rebuild_lut
+        self._lut_key = None # (height, bad, so bad) the table was built for
+        self.col_pings = [] # Ping value drawn in each buffer column (ring order, like the image)
+        self.col_times = [] # Timestamp of the ping drawn in each buffer column
+        self._lut_timeout = (hex_color(BLUE), 1)
+        self._dirty = False # Columns changed since the canvas items and label were last updated
+        self._repaint_after = None # ID of the pending after_idle repaint, if any
+        self._info_dirty = False # Stats changed since the info label was last formatted
+        self._info_after = None # ID of the pending throttled info label update, if any
 
         # --- UI Element Creation and Packing ---
         # create info label first and pack it to the top of the 'PingGraph'
@@ -90,42 +232,52 @@ class PingGraph(tk.Frame):
 
         self.canvas.bind("<Configure>", self.on_resize) # bind function on_resize to canvas resize
 
-        print(f"[INIT COMPLETE] PingGraph initialized for {host_ip}") 
+        log.debug("[INIT COMPLETE] PingGraph initialized for %s", host_ip)
+
+    def destroy(self):
+        # Pending repaint/label callbacks would otherwise fire on destroyed widgets
+        for after_id in (self._repaint_after, self._info_after, self.hover_timer):
+            if after_id is not None:
+                self.after_cancel(after_id)
+        self._repaint_after = self._info_after = self.hover_timer = None
+        super().destroy()
 
     def _create_or_resize_buffer(self, width, height):
-        """Creates or resizes the PIL Image buffer and the Tk PhotoImage."""
+        """Creates or resizes the Tk PhotoImage the graph is drawn into."""
         # ensure it's at least 1 pixel for drawing
         height = max(1, height)
         if width <= 0:
-            print(f"[BUFFER WARN {self.host_ip}] Invalid width for buffer: {width}") 
+            log.warning("[BUFFER WARN %s] Invalid width for buffer: %s", self.host_ip, width)
             return False
 
-        print(f"[BUFFER {self.host_ip}] Creating/Resizing buffer to {width}x{height}") 
+        log.debug("[BUFFER %s] Creating/Resizing buffer to %sx%s", self.host_ip, width, height)
         self.current_width = width
         self.current_height = height
+        self._rebuild_lut() # Line heights depend on the buffer height
 
         try:
-            # create a new black PIL Image
-            self.pil_image = Image.new("RGB", (width, height), color=BLACK)
-            # create PhotoImage from the PIL image
-            self.photo_image = ImageTk.PhotoImage(self.pil_image)
+            self.col_pings = [None] * width
+            self.col_times = [None] * width
+            # create an empty PhotoImage of the new size; it is filled in place by redraw_image_buffer
+            self.photo_image = tk.PhotoImage(master=self.canvas, width=width, height=height)
 
-            # if the canvas item doesn't exist, create it
+            # if the canvas item doesn't exist, create it; otherwise point it at the new PhotoImage
+            # (the only time the canvas item needs reconfiguring)
             if self.image_on_canvas is None:
-                self.image_on_canvas = self.canvas.create_image(
-                    0, 0, anchor=tk.NW, image=self.photo_image
-                )
-                print(f"[BUFFER {self.host_ip}] Created canvas image item: {self.image_on_canvas}") 
+                self._create_canvas_images()
+                log.debug("[BUFFER %s] Created canvas image item: %s", self.host_ip, self.image_on_canvas)
             else:
                 self.canvas.itemconfig(self.image_on_canvas, image=self.photo_image)
-                print(f"[BUFFER {self.host_ip}] Updated canvas image item: {self.image_on_canvas}") 
+                self.canvas.itemconfig(self.image_on_canvas_wrap, image=self.photo_image)
+                self._shown_head = None # Width changed, item offsets must be recomputed on next update
+                log.debug("[BUFFER %s] Updated canvas image item: %s", self.host_ip, self.image_on_canvas)
 
             return True
         except Exception as e:
-            print(f"[BUFFER ERROR {self.host_ip}] Failed to create/resize buffer: {e}")
-            self.pil_image = None
+            log.error("[BUFFER ERROR %s] Failed to create/resize buffer: %s", self.host_ip, e)
             self.photo_image = None
             self.image_on_canvas = None
+            self.image_on_canvas_wrap = None
             return False
 
     def on_resize(self, event=None):
@@ -136,43 +288,55 @@ class PingGraph(tk.Frame):
 
         # Ensure height is at least 1 for buffer creation
         new_height = max(1, new_height)
+        self._known_canvas_size = (new_width, new_height) # Lets add_ping skip querying Tk for the size
         
         # Check if size changed and is valid
         if (
-            (new_width == self.current_width and new_height == self.current_height and self.pil_image)
+            (new_width == self.current_width and new_height == self.current_height and self.photo_image)
             or new_width <= 0
         ):
-            print(f"[RESIZE SKIP/WAIT {self.host_ip}] Size {new_width}x{new_height}, Current {self.current_width}x{self.current_height}") 
+            log.debug("[RESIZE SKIP/WAIT %s] Size %sx%s, Current %sx%s", self.host_ip, new_width, new_height, self.current_width, self.current_height)
             return
 
-        print(f"[RESIZE {self.host_ip}] Triggered. New size: {new_width}x{new_height}") 
+        log.debug("[RESIZE %s] Triggered. New size: %sx%s", self.host_ip, new_width, new_height)
+
+        if new_width > self.pings.maxlen: # Keep at least a full canvas width of history
+            self.pings = collections.deque(self.pings, maxlen=new_width)
+            self.ping_times = collections.deque(self.ping_times, maxlen=new_width)
 
         if not self._create_or_resize_buffer(new_width, new_height):
             return
 
         self.redraw_image_buffer()
-        print(f"[RESIZE COMPLETE {self.host_ip}] Buffer resized and redrawn") 
+        log.debug("[RESIZE COMPLETE %s] Buffer resized and redrawn", self.host_ip)
 
     def redraw_image_buffer(self):
-        """Redraws the visible portion of ping history onto the PIL buffer."""
-        if not self.pil_image or self.current_width <= 0 or self.current_height <= 0:
-            print(f"[REDRAW WARN {self.host_ip}] Cannot redraw, buffer not ready.") 
+        """Redraws the visible portion of ping history onto the PhotoImage."""
+        if not self.photo_image or self.current_width <= 0 or self.current_height <= 0:
+            log.warning("[REDRAW WARN %s] Cannot redraw, buffer not ready.", self.host_ip)
             return
 
-        print(f"[REDRAW {self.host_ip}] Redrawing image buffer ({self.current_width}x{self.current_height})") 
-
-        draw = ImageDraw.Draw(self.pil_image)
-        draw.rectangle([0, 0, self.current_width, self.current_height], fill=BLACK) # Clear buffer
+        log.debug("[REDRAW %s] Redrawing image buffer (%sx%s)", self.host_ip, self.current_width, self.current_height)
 
         # Determine what amount of last pings should be visible (most recent ones up to buffer width, since 1 ping is 1-pixel wide vertical line)
-        visible_pings = self.pings[-self.current_width :]
+        first_visible = max(0, len(self.pings) - self.current_width)
+        visible_pings = list(itertools.islice(self.pings, first_visible, None))
+        self.col_pings[:len(visible_pings)] = visible_pings
+        self.col_times[:len(visible_pings)] = itertools.islice(self.ping_times, first_visible, None)
         num_visible = len(visible_pings)
-        print(f"[REDRAW {self.host_ip}] Drawing {num_visible} visible pings") 
+        log.debug("[REDRAW %s] Drawing %s visible pings", self.host_ip, num_visible)
 
-        # Draw each visible ping onto the *new* buffer starting from the left (index 0)
-        for buffer_x, val in enumerate(visible_pings):
-            # Draw the ping value at the calculated buffer_x coordinate
-            self.draw_line_on_image(buffer_x, val, self.pil_image)
+        # write_column rewrites every pixel of a drawn column, so the image only needs
+        # blanking when some columns will stay empty
+        if num_visible < self.current_width:
+            self.photo_image.blank() # Clear buffer (transparent, the black canvas shows through)
+
+        # Draw all visible pings onto the *new* buffer starting from the left (index 0), in one put
+        if self._lut:
+            try:
+                write_columns(self.photo_image, self.current_height, [self.column_style(val) for val in visible_pings])
+            except tk.TclError as e:
+                log.error("[REDRAW ERR %s] Tk error drawing %s columns: %s", self.host_ip, num_visible, e)
 
         # --- Update the current buffer index correctly ---
         # After a full redraw, the buffer is filled from the left up to 'num_visible' pings.
@@ -180,77 +344,120 @@ class PingGraph(tk.Frame):
         # would be at index 'num_visible'.
         # If num_visible == current_width, the buffer is full of ping lines.
         self.current_buffer_index = num_visible # Index for the *next* potential draw
+        self.col_head = 0 # Redrawn history starts at the left edge, the ring is unwrapped
 
         # Update the PhotoImage displayed on the canvas
-        self.photo_image = ImageTk.PhotoImage(self.pil_image)
-        if self.image_on_canvas:
-            self.canvas.itemconfig(self.image_on_canvas, image=self.photo_image)
-            print(f"[REDRAW {self.host_ip}] Canvas image updated.") 
-        else:
-            self.image_on_canvas = self.canvas.create_image(
-                0, 0, anchor=tk.NW, image=self.photo_image
-            )
-            print(f"[REDRAW {self.host_ip}] Created canvas image item during redraw.") 
-
-    def draw_line_on_image(self, x, ping_value, pil_img):
-        """Draws a single vertical ping line on the provided PIL Image object."""
-        # --- Use thresholds from the config ---
+        self._update_canvas_image()
+        log.debug("[REDRAW %s] Canvas image updated.", self.host_ip)
+
+    def _flush_repaint(self):
+        """Pushes the ring position and stats to the canvas/label if pings were added since the last repaint."""
+        if self._repaint_after is not None:
+            self.after_cancel(self._repaint_after) # No-op if this is the idle callback itself
+            self._repaint_after = None
+        if not self._dirty:
+            return
+        self._dirty = False
+        if self.photo_image:
+            self._update_canvas_image()
+        # The label text is throttled to INFO_INTERVAL_MS: formatting it and relaying out the label
+        # on every ping would make its cost grow with the ping rate
+        self._info_dirty = True
+        if self._info_after is None:
+            self._info_after = self.after(INFO_INTERVAL_MS, self._flush_info)
+
+    def _flush_info(self):
+        """Refreshes the info label once for all pings added since the last refresh."""
+        self._info_after = None
+        if not self._info_dirty:
+            return
+        self._info_dirty = False
+        # Update text info only if not in compact mode where labels are hidden
+        if not self.app.is_compact_mode or self.app.compact_mode_label_behavior == 'tiny':
+            self.update_info()
+
+    def _update_canvas_image(self):
+        """Positions the canvas items for the current ring head. Columns are already drawn into the
+        PhotoImage, so there is nothing to copy (no new Tk image, no canvas itemconfig)."""
+        if not self.image_on_canvas:
+            log.warning("[WARN %s] image_on_canvas is None. Creating.", self.host_ip)
+            self._create_canvas_images()
+        if self._shown_head != self.col_head:
+            # Columns [col_head, width) go to the left edge, columns [0, col_head) follow them
+            self.canvas.coords(self.image_on_canvas, -self.col_head, 0)
+            self.canvas.coords(self.image_on_canvas_wrap, self.current_width - self.col_head, 0)
+            self._shown_head = self.col_head
+
+    def _create_canvas_images(self):
+        """Creates the two canvas items that display the ring buffer, positioned for col_head."""
+        self.image_on_canvas = self.canvas.create_image(
+            -self.col_head, 0, anchor=tk.NW, image=self.photo_image
+        )
+        self.image_on_canvas_wrap = self.canvas.create_image(
+            self.current_width - self.col_head, 0, anchor=tk.NW, image=self.photo_image
+        )
+        self._shown_head = self.col_head
+
+    def _rebuild_lut(self):
+        """Looks up the (color, line height) table for the current graph height and thresholds (see column_style_table).
+        Must be called whenever the graph height or the thresholds change."""
         # Ensure app reference exists before accessing config
         if not hasattr(self.app, 'config'): return
-        bad_threshold = self.app.config.bad_threshold
-        so_bad_threshold = self.app.config.so_bad_threshold
-
-        if not pil_img: return
-        w = pil_img.width
-        h = pil_img.height
+        h = self.current_height
+        self._lut_key = (h, self.app.config.bad_threshold, self.app.config.so_bad_threshold)
+        self._lut = column_style_table(*self._lut_key)
+        self._lut_timeout = (hex_color(BLUE), h)
+
+    def column_style(self, ping_value):
+        """Returns the (color, line height) a ping is drawn with."""
+        # Color/Height lookup (the table already encodes the thresholds and graph height)
+        if ping_value is False or ping_value is None or not isinstance(ping_value, (int, float)) or ping_value < 0:
+            return self._lut_timeout # Timeouts/errors (and unexpected types) draw a full blue line
+        lut = self._lut
+        idx = int(ping_value)
+        if idx < len(lut):
+            return lut[idx]
+        col, lh = ping_style(idx, *self._lut_key) # Past the table (STYLE_TABLE_MS or more)
+        return hex_color(col), lh
+
+    def draw_line_on_image(self, x, ping_value):
+        """Draws a single vertical ping line into the PhotoImage."""
+        if self.photo_image is None or not self._lut: return
+        w = self.current_width
+        h = self.current_height
         if h <= 0 or not (0 <= x < w) : return # Bounds check for x and h
 
-        # Color/Height calculation (uses config)
-        col = BLACK # Default/fallback
-        lh = 0 # Default line height
-        if ping_value is False or ping_value is None or (isinstance(ping_value, (int, float)) and ping_value < 0): # Explicit check for False/None/Negative
-            lh = h
-            col = BLUE
-        elif isinstance(ping_value, (int, float)): # Only proceed if numeric and positive
-            if ping_value < 1:
-                lh = 1
-                col = GREEN
-            elif ping_value < bad_threshold:
-                f = ping_value / bad_threshold
-                lh = max(1, int(interpolate(1, h * 0.5, f)))
-                col = interpolate_color_tuple(GREEN, YELLOW, f)
-            elif ping_value < so_bad_threshold:
-                f = (ping_value - bad_threshold) / (so_bad_threshold - bad_threshold)
-                lh = int(interpolate(h * 0.5, h, f))
-                col = interpolate_color_tuple(YELLOW, RED, f)
-            else: # >= so_bad_threshold
-                lh = h
-                col = RED
-        else: # should not happen if input is cleaned
-            lh = h
-            col = BLUE # Treat other unexpected types as timeout
-
-        lh = min(h, max(1, int(lh))) # Ensure line height is within bounds and integer
-        y0 = h - lh
-        y1 = h - 1 # Draw up to the last pixel row
-
-        # Draw using putpixel for potentially better performance on single columns
+        color, lh = self.column_style(ping_value)
         try:
-            # Avoid creating ImageDraw object repeatedly if possible, but safer here
-            # For single column, putpixel is fine
-            for y in range(y0, y1 + 1):
-                if 0 <= y < h: # Double check y bounds
-                    pil_img.putpixel((int(x), y), col)
-        except IndexError:
-            print(f"[DRAW ERR {self.host_ip}] Index error drawing at x={x}, y=[{y0},{y1}] on image {w}x{h}")
+            write_column(self.photo_image, h, int(x), color, lh)
+        except tk.TclError as e:
+            log.error("[DRAW ERR %s] Tk error drawing at x=%s, height %s on image %sx%s: %s", self.host_ip, x, lh, w, h, e)
         except Exception as e:
-            print(f"[DRAW ERR {self.host_ip}] Error drawing line: {e}")
+            log.error("[DRAW ERR %s] Error drawing line: %s", self.host_ip, e)
+
+
+    def add_ping(self, ping_value, timestamp=None):
+        """Adds a new ping result and schedules a deferred repaint of the canvas and info label."""
+        self._append_ping_data(ping_value, timestamp)
+        self._schedule_repaint()
+
+    def add_ping_batch(self, batch):
+        """Adds a list of (ping_value, timestamp) results; the canvas and label are repainted once for all of them."""
+        for ping_value, timestamp in batch:
+            self._append_ping_data(ping_value, timestamp)
+        self._schedule_repaint()
 
+    def _schedule_repaint(self):
+        """Debounces repaints: results arriving before Tk goes idle share a single _flush_repaint."""
+        if self._repaint_after is None:
+            self._repaint_after = self.after_idle(self._flush_repaint)
 
-    def add_ping(self, ping_value):
-        """Adds a new ping result, updates stats in O(1), updates the image buffer, and refreshes the canvas."""
-        print(f"[PING {self.host_ip}] Adding ping result: {ping_value}") 
+    def _append_ping_data(self, ping_value, timestamp=None):
+        """Records a ping result: history, stats in O(1) and its column in the image. Does not touch the canvas;
+        callers batch several results and then schedule a single repaint."""
+        log.debug("[PING %s] Adding ping result: %s", self.host_ip, ping_value)
         self.pings.append(ping_value)
+        self.ping_times.append(timestamp)
 
         # --- Update Statistics ---
         total_pings = len(self.pings)
@@ -259,6 +466,7 @@ class PingGraph(tk.Frame):
             self.stat_sum += ping_value
             self.stat_min = min(self.stat_min, ping_value)
             self.stat_max = max(self.stat_max, ping_value)
+            self.stat_hist[hist_bin(ping_value)] += 1
             if self.stat_last_valid_ping is not None:
                 jitter = abs(ping_value - self.stat_last_valid_ping)
                 self.stat_jitter_sum += jitter
@@ -266,56 +474,49 @@ class PingGraph(tk.Frame):
             self.stat_last_valid_ping = ping_value
         else: # Timeout or error (None, False, < 0)
             self.stat_loss_count += 1
+            if self.stat_count == 0 and self.stat_loss_count == UNRESPONSIVE_AFTER + 1:
+                # Never answered after enough attempts: let the app's periodic cleanup know, once
+                self.app._unresponsive_candidates.add(self.host_ip)
         # --- End Statistics Update ---
 
 
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
+        if self._known_canvas_size is not None:
+            canvas_width, canvas_height = self._known_canvas_size
+        else: # No <Configure> seen yet
+            canvas_width = self.canvas.winfo_width()
+            canvas_height = max(1, self.canvas.winfo_height())
 
         # Ensure buffer exists and matches current canvas dimensions
-        if (not self.pil_image or self.current_width != canvas_width or self.current_height != canvas_height):
-            print(f"[PING WARN {self.host_ip}] Buffer mismatch/missing. Forcing resize/redraw.") 
+        if (not self.photo_image or self.current_width != canvas_width or self.current_height != canvas_height):
+            log.warning("[PING WARN %s] Buffer mismatch/missing. Forcing resize/redraw.", self.host_ip)
             if not self._create_or_resize_buffer(canvas_width, max(1, canvas_height)): # Ensure height >= 1
-                print(f"[PING ERR {self.host_ip}] Failed to create buffer. Cannot add ping visually.")
+                log.error("[PING ERR %s] Failed to create buffer. Cannot add ping visually.", self.host_ip)
                 return
             self.redraw_image_buffer() # Redraw history; current_buffer_index is reset here
+            self._dirty = True
+            return # The redraw already drew this ping, it is the newest entry of self.pings
 
         # --- Drawing Logic ---
-        num_pings = len(self.pings)
+        if not self.photo_image: return # Cannot draw without a buffer
 
-        if not self.pil_image: return # Cannot draw without a buffer
-
-        if num_pings <= self.current_width:
+        # Whether the buffer is full is decided by the columns drawn so far, not by len(self.pings):
+        # the history deque is capped and may hold exactly one canvas width of pings
+        if self.current_buffer_index < self.current_width:
             # Buffer is not full yet, draw at the next position
-            draw_x = num_pings - 1
-            print(f"[DRAW {self.host_ip}] Drawing new line at index {draw_x}") 
-            self.draw_line_on_image(draw_x, ping_value, self.pil_image)
-            self.current_buffer_index = num_pings # Next index is simply the new count
-        else:
-            # Buffer is full, shift image left, draw at the end
-            print(f"[SHIFT {self.host_ip}] Shifting buffer content left") 
-            if self.current_width > 1: # Avoid cropping if width is 1
-                shifted_region = self.pil_image.crop((1, 0, self.current_width, self.current_height))
-                self.pil_image.paste(shifted_region, (0, 0))
-            # Clear the last column before drawing
-            draw = ImageDraw.Draw(self.pil_image)
-            draw.rectangle([(self.current_width - 1, 0),(self.current_width, self.current_height)],fill=BLACK)
-            # Draw the new ping value in the last column
-            self.draw_line_on_image(self.current_width - 1, ping_value, self.pil_image)
-            # current_buffer_index remains >= current_width (conceptually)
-
-        # --- Update Canvas ---
-        self.photo_image = ImageTk.PhotoImage(self.pil_image)
-        if self.image_on_canvas:
-            self.canvas.itemconfig(self.image_on_canvas, image=self.photo_image)
+            draw_x = self.current_buffer_index
+            log.debug("[DRAW %s] Drawing new line at index %s", self.host_ip, draw_x)
+            self.draw_line_on_image(draw_x, ping_value)
+            self.current_buffer_index += 1
         else:
-            print(f"[WARN {self.host_ip}] image_on_canvas is None during add_ping. Creating.") 
-            self.image_on_canvas = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo_image)
-
-        # Update text info only if not in compact mode where labels are hidden
-        if not self.app.is_compact_mode or self.app.compact_mode_label_behavior == 'tiny':
-            self.update_info()
-
+            # Buffer is full, overwrite the oldest column and advance the ring head (no shifting)
+            draw_x = self.col_head
+            log.debug("[WRAP %s] Overwriting ring column %s", self.host_ip, draw_x)
+            self.draw_line_on_image(draw_x, ping_value) # Also blanks the old ping above the new line
+            self.col_head = (draw_x + 1) % self.current_width
+            # current_buffer_index stays at current_width until the next redraw
+        self.col_pings[draw_x] = ping_value
+        self.col_times[draw_x] = timestamp
+        self._dirty = True # Canvas is updated by _flush_repaint
 
     def get_info_text(self, extra=""):
         """Generates the text for the info label, using all historical data for stats (not only visible pings)."""
@@ -333,7 +534,9 @@ class PingGraph(tk.Frame):
             loss_percent = round((self.stat_loss_count / total_pings) * 100, 1) if total_pings > 0 else 0
             jitter = round(self.stat_jitter_sum / self.stat_jitter_count, 2) if self.stat_jitter_count > 0 else 0
 
-            stats = f"min:{mini} max:{maxi} avg:{avg} last:{last} loss:{loss_percent}% jit:{jitter}"
+            p50, p90, p99 = (round(v, 1) for v in hist_percentiles(self.stat_hist, self.stat_count, (0.5, 0.9, 0.99)))
+
+            stats = f"min:{mini} max:{maxi} avg:{avg} last:{last} loss:{loss_percent}% jit:{jitter} p50:{p50} p90:{p90} p99:{p99}"
         else: # No successful pings yet
             loss_percent = round((self.stat_loss_count / total_pings) * 100, 1) if total_pings > 0 else 0
             stats = f"loss:{loss_percent}% ({total_pings} total attempts)"
@@ -353,38 +556,27 @@ class PingGraph(tk.Frame):
         return final_text
 
     def update_info(self):
-        print(f"[INFO {self.host_ip}] Updating label") 
+        log.debug("[INFO %s] Updating label", self.host_ip)
         # Update only if the label hasn't been hidden by compact mode
         if self.info_label.winfo_ismapped():
             self.info_label.config(text=self.get_info_text())
 
+    def ping_at_column(self, x):
+        """Returns (value, timestamp) of the ping drawn at canvas column x, or None if nothing is drawn there."""
+        w = self.current_width
+        if not (0 <= x < min(self.current_buffer_index, w)):
+            return None
+        i = (self.col_head + x) % w # Screen column -> ring buffer column
+        return self.col_pings[i], self.col_times[i]
+
     def on_mouse_move(self, event):
         """Handles mouse movement over the canvas to display ping details."""
-        canvas_width = self.canvas.winfo_width()
-        if canvas_width <= 0: return
-
-        num_pings = len(self.pings)
-        if num_pings == 0: return # No pings yet
-
         x = int(event.x)
-        target_index = -1 # Default to invalid index
-
-        # --- Corrected Index Calculation (Fixing Hover Bug) ---
-        if num_pings < canvas_width:
-            # Data is aligned to the left, not filling the canvas
-            # Check if hover x is within the drawn data area (0 to num_pings - 1)
-            if 0 <= x < num_pings:
-                target_index = x # Index in pings array is directly x
-        else:
-            # Data fills the canvas, potentially shifted left
-            # Check if hover x is within the canvas bounds (0 to canvas_width - 1)
-            if 0 <= x < canvas_width:
-                # The data displayed starts at index (num_pings - canvas_width)
-                target_index = (num_pings - canvas_width) + x
-
-        # --- Display Info if Index is Valid ---
-        if 0 <= target_index < num_pings:
-            value = self.pings[target_index]
+        hit = self.ping_at_column(x)
+
+        # --- Display Info if a ping is drawn under the cursor ---
+        if hit is not None:
+            value, timestamp = hit
             value_str = "Timeout/Error"
             if isinstance(value, (int, float)) and value >= 0 and value is not False:
                 value_str = f"{round(value, 2)} ms"
@@ -395,11 +587,10 @@ class PingGraph(tk.Frame):
 
             # --- Get Timestamp ---
             ping_time_str = "??:??:??"
-            if hasattr(self.app, 'ping_timestamps') and target_index < len(self.app.ping_timestamps):
-                timestamp = self.app.ping_timestamps[target_index]
+            if timestamp is not None:
                 ping_time_str = time.strftime("%H:%M:%S", time.localtime(timestamp))
             else:
-                print(f"[WARN {self.host_ip}] Timestamp index {target_index} out of bounds ({len(self.app.ping_timestamps)})")
+                log.warning("[WARN %s] No timestamp for ping at x=%s", self.host_ip, x)
 
 
             # --- Host Info: IP (Hostname) or IP ---
@@ -409,7 +600,7 @@ class PingGraph(tk.Frame):
             # Update label only if not in compact mode where labels are hidden
             if not self.app.is_compact_mode or self.app.compact_mode_label_behavior == 'tiny':
                 self.info_label.config(text=self.get_info_text(extra=disp))
-            print(f"[HOVER {self.host_ip}] Index {target_index} (x={x}), Value: {value}") 
+            log.debug("[HOVER %s] x=%s, Value: %s", self.host_ip, x, value)
 
             # Schedule revert back to normal info text
             if self.hover_timer is not None:
@@ -422,7 +613,7 @@ class PingGraph(tk.Frame):
 
 
     def on_mouse_leave(self, event):
-        print(f"[HOVER LEAVE {self.host_ip}]") 
+        log.debug("[HOVER LEAVE %s]", self.host_ip)
         if self.hover_timer is not None:
             self.after_cancel(self.hover_timer)
             self.hover_timer = None
@@ -451,63 +642,87 @@ class PingGraph(tk.Frame):
 
 
 class PingRunner(threading.Thread):
+    """Persistent ping worker for one host: pings once for every round index taken from its job queue,
+    until it gets a None sentinel or the run's stop event is set."""
     def __init__(
-        self, host_ip, ping_timeout, ping_size, rate, result_queue, index, stop_event
+        self, host_ip, ping_timeout, ping_size, jobs, results, stop_event, notify, max_pending
     ):
-        print(f"[THREAD INIT] PingRunner for {host_ip}") 
-        super().__init__()
+        log.debug("[RUNNER INIT] PingRunner for %s", host_ip)
+        super().__init__(name=f"ping-{host_ip}", daemon=True)
         self.host_ip = host_ip
         self.ping_timeout = ping_timeout
         self.ping_size = ping_size
-        self.rate = rate
-        self.result_queue = result_queue
-        self.index = index # This is the ping_round_index
+        self.jobs = jobs # queue.Queue of round indexes (None = exit), shared by this host's workers
+        self.results = results # deque shared with the app (append/popleft are atomic)
         self.stop_event = stop_event
+        self.notify = notify # Called after each appended result to wake up the Tk thread
+        # Everything but the round index is fixed for the run, so the ping call is curried once here:
+        # ping3 expects timeout in seconds, and size must be non-negative
+        self._ping = partial(
+            ping, host_ip, timeout=max(0.01, float(ping_timeout)), size=max(0, int(ping_size)), unit="ms"
+        )
+        self.max_pending = max_pending # Results waiting in 'results' above which new ones are dropped
+        self.dropped = 0 # Results dropped because the Tk thread wasn't draining 'results'
 
     def run(self):
-        print(f"[THREAD START] Pinging {self.host_ip}") 
+        log.debug("[THREAD START] Worker for %s", self.host_ip)
+        while True:
+            index = self.jobs.get() # This is the ping_round_index
+            if index is None or self.stop_event.is_set():
+                break
+            ping_result = self.ping_once()
+            if len(self.results) >= self.max_pending:
+                self.stop_event.wait(0.1) # Backpressure: give a busy Tk thread a moment to drain
+            # Only put result if the stop event wasn't set *during* the ping execution
+            if self.stop_event.is_set():
+                 log.debug("[THREAD STOP] Stop event set after pinging %s", self.host_ip)
+            elif len(self.results) >= self.max_pending:
+                 # The UI isn't keeping up; drop instead of letting the backlog grow without limit
+                 self.dropped += 1
+                 if self.dropped % 100 == 1:
+                     log.warning("[RESULT DROP] %s: %s results dropped, UI not draining", self.host_ip, self.dropped)
+            else:
+                 # Queue tuple: (host_ip, ping_round_index, result_value)
+                 self.results.append((self.host_ip, index, ping_result))
+                 self.notify()
+        log.debug("[THREAD STOP] Worker for %s exiting", self.host_ip)
+
+    def ping_once(self):
+        """Pings the host once; returns the time in ms, None on timeout or False on error."""
         ping_result = False # Default to False for errors/timeouts
+        try:
+            # Perform the ping
+            result_ms = self._ping()
+
+            # Process the result from ping3
+            if result_ms is None: # Explicit timeout indication from ping3
+                ping_result = None # Use None consistently for timeout
+                log.debug("[PING TIMEOUT] Host: %s", self.host_ip)
+            elif result_ms is False: # Explicit error indication from ping3
+                ping_result = False # Use False consistently for error
+                log.debug("[PING FAIL] Host: %s", self.host_ip)
+            elif isinstance(result_ms, (int, float)):
+                 ping_result = result_ms # Keep the numeric value
+                 log.debug("[PING RESULT] Host: %s, Result: %s ms", self.host_ip, ping_result)
+            else: # Unexpected result type
+                 ping_result = False # Treat as error
+                 log.warning("[PING UNEXPECTED] Host: %s, Result: %s", self.host_ip, result_ms)
+
+        except Exception as e:
+            log.error("[PING EXCEPTION] Host: %s, Error: %s", self.host_ip, e)
+            ping_result = False # Indicate error
+        return ping_result
 
-        if self.stop_event.is_set():
-            print(f"[THREAD STOP] Stop event set before pinging {self.host_ip}") 
-            pass # Put result False outside the try block
-        else:
-            try:
-                # ping3 expects timeout in seconds
-                timeout_sec = max(0.01, float(self.ping_timeout))
-                # Ensure size is non-negative
-                packet_size = max(0, int(self.ping_size))
-
-                # Perform the ping
-                result_ms = ping(
-                    self.host_ip, timeout=timeout_sec, size=packet_size, unit="ms"
-                )
-
-                # Process the result from ping3
-                if result_ms is None: # Explicit timeout indication from ping3
-                    ping_result = None # Use None consistently for timeout
-                    print(f"[PING TIMEOUT] Host: {self.host_ip}") 
-                elif result_ms is False: # Explicit error indication from ping3
-                    ping_result = False # Use False consistently for error
-                    print(f"[PING FAIL] Host: {self.host_ip}") 
-                elif isinstance(result_ms, (int, float)):
-                     ping_result = result_ms # Keep the numeric value
-                     print(f"[PING RESULT] Host: {self.host_ip}, Result: {ping_result} ms") 
-                else: # Unexpected result type
-                     ping_result = False # Treat as error
-                     print(f"[PING UNEXPECTED] Host: {self.host_ip}, Result: {result_ms}")
-
-            except Exception as e:
-                print(f"[PING EXCEPTION] Host: {self.host_ip}, Error: {e}")
-                ping_result = False # Indicate error
-
-        # Only put result if the stop event wasn't set *during* the ping execution
-        if not self.stop_event.is_set():
-             # Queue tuple: (host_ip, ping_round_index, result_value)
-             self.result_queue.put((self.host_ip, self.index, ping_result))
-        # else:
-             print(f"[THREAD STOP] Stop event set after pinging {self.host_ip}") 
-             pass
+
+# Entry-backed settings read by PingApp._read_settings:
+# (entry widget attribute, config attribute, cast, min, max, name used in warnings)
+SETTINGS_SPEC = (
+    ("rate_entry", "ping_rate", float, 0.01, 50, "ping rate"),
+    ("timeout_entry", "ping_timeout", float, 0.1, 10, "timeout"),
+    ("size_entry", "ping_size", int, 0, 1400, "ping size"),
+    ("bad_entry", "bad_threshold", float, 1, 5000, "bad threshold"),
+    ("sobad_entry", "so_bad_threshold", float, None, 5000, "'so bad' threshold"), # Must also exceed 'bad', checked after the loop
+)
 
 
 class PingApp(tk.Tk):
@@ -520,15 +735,23 @@ class PingApp(tk.Tk):
         self.minsize(150, 100) # Adjusted min size
 
         self.config = config
+        self._settings_cache = {} # field name -> (last accepted entry text, parsed value)
 
         self.ping_graphs = {} # Dictionary: host_ip -> PingGraph instance
         self.ping_order = [] # List to remember traceroute hops order for display
-        self.ping_timestamps = [] # Unified list for timestamps (since pings are done in rounds, a ping at the same index across all hops/hosts is done in the same round and is expected to be performed at nearly the same time)
+        self._packed_state = {} # host_ip -> whether its PingGraph is currently packed in graph_frame
+        self._unresponsive_candidates = set() # host_ips flagged by their PingGraph for clean_unpingable
+        self._round_targets = () # (host_ip, job queue) per pinged hop in ping_order, rebuilt only when hops are added/removed
+        self.ping_timestamps = collections.deque(maxlen=PING_HISTORY) # Timestamps of the most recent rounds (round i is at index i - first_round, see round_timestamp), shared by all hosts since a round pings every hop at nearly the same time
         self.ping_round_index = 0
-        self.result_queue = queue.Queue()
+        self._results = collections.deque() # (host_ip, round_idx, value) tuples from PingRunner threads, bounded by the runners' max_pending
+        self._result_event_pending = False # A <<PingResult>> is queued and process_ping_results hasn't run yet
         self.running = False
         self.stop_event = threading.Event()
+        self.ping_jobs = {} # host_ip -> queue.Queue of round indexes for that host's PingRunner workers
+        self._workers_per_host = 1 # PingRunner threads sharing each host's job queue in the current run
         self._scheduled_ping_after_id = None
+        self._next_round_deadline = 0.0 # time.monotonic() at which the next ping round is due
 
         # --- State for On Top Mode ---
         self.is_compact_mode = False
@@ -538,13 +761,20 @@ class PingApp(tk.Tk):
         self.original_alpha = 1.0
         self._drag_offset_x = 0 # For dragging borderless window
         self._drag_offset_y = 0
+        self._drag_binds = [] # (widget, sequence, funcid) of the drag bindings active in compact mode
+        self._pending_drag_xy = None # Latest window position requested by _do_drag
+        self._drag_after_id = None # ID of the pending after_idle that applies it
 
         self.build_options_frame()
         self.build_status_frame()
         self.build_graph_frame()
+        # One label for traceroute progress and errors, created once and only reconfigured and
+        # packed/unpacked; it is a child of the window so swapping graph_frame leaves it alone
+        self._status_label = tk.Label(self, bg="#222222")
 
+        # Results are processed when a worker posts one, instead of polling the queue on a timer
+        self.bind("<<PingResult>>", self.process_ping_results)
         self.handle_auto_start()
-        self.after(100, self.process_ping_results) # Start processing queue
         print("[APP INIT COMPLETE]") 
 
     def handle_auto_start(self):
@@ -653,14 +883,7 @@ class PingApp(tk.Tk):
 
         self.graph_vars = {}
         print("[UI] Status frame ready") 
-
-        # --- Bindings for dragging borderless window ---
-        self.status_frame.bind("<Button-1>", self._start_drag)
-        self.status_frame.bind("<B1-Motion>", self._do_drag)
-        # Also bind the checkbox itself, otherwise clicking it might not start drag
-        self.always_on_top_check.bind("<Button-1>", self._start_drag)
-        self.always_on_top_check.bind("<B1-Motion>", self._do_drag)
-        # You might need to bind other static elements in status_frame too if they cover significant area
+        # Dragging the borderless window is bound only while in compact mode, see _bind_drag
 
 
     def build_graph_frame(self):
@@ -669,78 +892,79 @@ class PingApp(tk.Tk):
         self.graph_frame.pack(fill=tk.BOTH, expand=True, side=tk.BOTTOM)
         self.graph_frame.config(height=1) # Start small when nothing is running
 
+    def _show_status(self, text, fg):
+        """Shows 'text' in the status label, above the graphs."""
+        self._status_label.config(text=text, fg=fg)
+        if not self._status_label.winfo_manager():
+            # Right below the status bar when it is shown, otherwise right above the graph area
+            if self.status_frame.winfo_manager():
+                self._status_label.pack(side=tk.TOP, pady=20, after=self.status_frame)
+            else:
+                self._status_label.pack(side=tk.TOP, pady=20, before=self.graph_frame)
+
+    def _clear_graph_frame(self):
+        """Swaps graph_frame and graph_checkbox_frame for fresh empty frames and hides the status label.
+        Destroying the old parents tears down all graphs and toggles in one pass, instead of one
+        destroy() (and relayout) per child."""
+        old_graph_frame, old_checkbox_frame = self.graph_frame, self.graph_checkbox_frame
+        self._status_label.pack_forget()
+        self.build_graph_frame() # New graph_frame
+        self.graph_checkbox_frame = tk.Frame(self.status_frame, bg="#333333")
+        if old_checkbox_frame.winfo_manager(): # Keep it packed if it was (it is hidden in compact mode)
+            self.graph_checkbox_frame.pack(side=tk.LEFT, padx=5, pady=0, fill=tk.X, expand=True)
+        old_checkbox_frame.destroy()
+        old_graph_frame.destroy()
+
     def handle_enter(self):
         if not self.running: self.start_button.invoke()
 
     def handle_escape(self):
         if self.running: self.stop_button.invoke()
 
-    def _read_settings(self):
-        """Reads and validates ALL settings from entry widgets."""
-        print("[SETTINGS] Reading settings from UI") 
-
-        # --- Rate ---
-        try:
-            rate = float(self.rate_entry.get())
-            if not (0.01 <= rate <= 50): raise ValueError("Rate out of bounds")
-            self.config.ping_rate = rate
-        except ValueError:
-            print("[WARN] Invalid ping rate. Reverting.") 
-            self.rate_entry.delete(0, tk.END)
-            self.rate_entry.insert(0, str(self.config.ping_rate))
-        self.update_rate_label() # Update text label regardless
-
-        # --- Timeout ---
-        try:
-            timeout = float(self.timeout_entry.get())
-            if not (0.1 <= timeout <= 10): raise ValueError("Timeout out of bounds")
-            self.config.ping_timeout = timeout
-        except ValueError:
-            print("[WARN] Invalid timeout. Reverting.") 
-            self.timeout_entry.delete(0, tk.END)
-            self.timeout_entry.insert(0, str(self.config.ping_timeout))
-
-        # --- Size ---
+    def _parse_setting(self, entry, name, default, cast, lo, hi):
+        """Parses and bounds-checks an entry with 'cast', reverting it to 'default' if invalid ('lo' None = no minimum).
+        The last accepted text per field is cached so an unchanged entry skips the parse."""
+        text = entry.get()
+        cached = self._settings_cache.get(name)
+        if cached is not None and cached[0] == text:
+            return cached[1]
         try:
-            size = int(self.size_entry.get())
-            if not (0 <= size <= 1400): raise ValueError("Size out of bounds")
-            self.config.ping_size = size
+            value = cast(text)
+            if not ((lo is None or lo <= value) and value <= hi): raise ValueError(f"{name} out of bounds")
         except ValueError:
-            print("[WARN] Invalid ping size. Reverting.") 
-            self.size_entry.delete(0, tk.END)
-            self.size_entry.insert(0, str(self.config.ping_size))
+            # 'default' comes from the command line or --config, which are not range checked
+            default = min(default if lo is None else max(lo, default), hi)
+            log.warning("[WARN] Invalid %s. Reverting.", name)
+            entry.delete(0, tk.END)
+            entry.insert(0, str(default))
+            return default
+        self._settings_cache[name] = (text, value)
+        return value
 
-        # --- Bad Threshold ---
-        try:
-            bad = float(self.bad_entry.get())
-            if not (1 <= bad <= 5000): raise ValueError("Bad threshold out of bounds")
-            self.config.bad_threshold = bad
-        except ValueError:
-            print("[WARN] Invalid bad threshold. Reverting.") 
-            self.bad_entry.delete(0, tk.END)
-            self.bad_entry.insert(0, str(self.config.bad_threshold))
+    def _read_settings(self):
+        """Reads and validates ALL settings from entry widgets."""
+        log.info("[SETTINGS] Reading settings from UI")
 
-        # --- So Bad Threshold ---
-        try:
-            so_bad = float(self.sobad_entry.get())
-            # Check against the potentially just updated bad_threshold
-            if not (self.config.bad_threshold < so_bad <= 5000):
-                raise ValueError("'So Bad' threshold invalid relative to 'Bad' or bounds")
-            self.config.so_bad_threshold = so_bad
-        except ValueError:
-            print("[WARN] Invalid 'so bad' threshold. Adjusting/Reverting.") 
-            # Ensure so_bad is strictly greater than bad
-            self.config.so_bad_threshold = self.config.bad_threshold + 50
-            self.sobad_entry.delete(0, tk.END)
-            self.sobad_entry.insert(0, str(self.config.so_bad_threshold))
+        config = self.config
+        for entry_attr, config_attr, cast, lo, hi, name in SETTINGS_SPEC:
+            if config_attr == "so_bad_threshold":
+                default = config.bad_threshold + 50 # An invalid 'so bad' is reset just above 'bad' (read before it)
+            else:
+                default = getattr(config, config_attr)
+            setattr(config, config_attr, self._parse_setting(getattr(self, entry_attr), name, default, cast, lo, hi))
+        self.update_rate_label() # Update text label regardless
 
         # Final check: ensure bad < so_bad after all updates
         if self.config.bad_threshold >= self.config.so_bad_threshold:
-            print("[WARN] Bad threshold >= So Bad threshold. Adjusting So Bad.") 
+            log.warning("[WARN] Bad threshold >= So Bad threshold. Adjusting So Bad.")
             self.config.so_bad_threshold = self.config.bad_threshold + 50
             self.sobad_entry.delete(0, tk.END)
             self.sobad_entry.insert(0, str(self.config.so_bad_threshold))
-        print("[SETTINGS] Settings read complete.") 
+
+        # Graphs cache colors/heights derived from the thresholds
+        for pg in self.ping_graphs.values():
+            pg._rebuild_lut()
+        log.info("[SETTINGS] Settings read complete.")
 
     def start_pinging(self):
         print("[START] Initiating pinging process...") 
@@ -749,18 +973,22 @@ class PingApp(tk.Tk):
             return
 
         self.stop_pinging(clear_ui=False)
-        self.stop_event.clear()
+        # Fresh event per run: runners still blocked in an old round keep the old (set) event,
+        # so their late results are dropped instead of leaking into this run
+        self.stop_event = threading.Event()
 
-        for widget in self.graph_frame.winfo_children(): widget.destroy()
+        self._clear_graph_frame()
         self.ping_graphs.clear()
-        for widget in self.graph_checkbox_frame.winfo_children(): widget.destroy()
+        self._packed_state.clear()
+        self._unresponsive_candidates.clear()
         self.graph_vars.clear()
         self.ping_order.clear()
         self.ping_timestamps.clear() # Clear timestamps
         self.ping_round_index = 0
-        while not self.result_queue.empty():
-            try: self.result_queue.get_nowait()
-            except queue.Empty: break
+        # Fresh deque rather than clear(): workers of a previous run only hold the old one,
+        # so nothing they append can reach this run
+        self._results = collections.deque()
+        self._result_event_pending = False
 
         target = self.host_entry.get().strip()
         if not target:
@@ -782,101 +1010,119 @@ class PingApp(tk.Tk):
         self.stop_button.config(state=tk.NORMAL)
 
         print("[INFO] Starting traceroute thread...") 
-        self.status_label = tk.Label(self.graph_frame,text=f"Tracing route to {target}...",bg="#222222",fg="grey")
-        self.status_label.pack(pady=20)
-        self.update_idletasks()
+        self._show_status(f"Tracing route to {target}...", "grey") # Shown on the next idle pass; the traceroute runs off the Tk thread
+
+        # Persistent workers per traced host: enough threads on its job queue to have a ping in flight
+        # for each round that can overlap within the timeout, up to MAX_WORKERS_PER_HOST
+        rounds_in_flight = max(1, math.ceil(self.config.ping_timeout * self.config.ping_rate))
+        self._workers_per_host = min(rounds_in_flight, MAX_WORKERS_PER_HOST)
 
-        threading.Thread(target=self.do_trace_route, args=(target,), daemon=True).start()
+        threading.Thread(target=self.do_trace_route, args=(target, self.stop_event), daemon=True).start()
 
-    def do_trace_route(self, target):
+    def do_trace_route(self, target, stop_event):
+        """Runs the traceroute (off the Tk thread) and hands each hop to the Tk thread as soon as the trace
+        prints it, so its graph appears and is pinged while later hops are still being traced."""
         print(f"[TRACE] Starting traceroute to {target}") 
-        hops = None
+        hop_count = 0
+        error = None
         try:
-            hops = trace_route(target)
+            for hop_number, hop in enumerate(iter_hops(target), 1):
+                if stop_event.is_set(): break # Stopped meanwhile; leaving the loop ends the trace
+                hop_count = hop_number
+                self.after(0, self._add_traced_hop, stop_event, target, hop_number, hop)
         except Exception as e:
-            print(f"[TRACE ERROR] Error during trace_route: {e}")
-            hops = None
-        self.after(0, self._process_traceroute_results, hops, target)
-
-    def _process_traceroute_results(self, hops, target): # Added 'app=self' to PingGraph call
+            print(f"[TRACE ERROR] Error during traceroute: {e}")
+            error = e
+        self.after(0, self._finish_traceroute, stop_event, target, hop_count, error)
+
+    def _add_traced_hop(self, stop_event, target, hop_number, hop):
+        """Adds the graph and toggle for one traced hop and starts pinging it (Tk thread)."""
+        if stop_event is not self.stop_event or stop_event.is_set():
+            return # Hop of a run that was stopped (or replaced by a newer one) meanwhile
+        self._show_status(f"Tracing route to {target}... (hop {hop_number})", "grey")
+        if not hop.ip or hop.ip in self.ping_graphs: return # No answer, or a hop seen before (routing loop)
+
+        host_ip = hop.ip
+        host_hostname = hop.hostname # None, or a name different from the IP
+        short_label = f"{hop_number}" # Use hop number for short label
+
+        print(f"[GRAPH] Adding PingGraph for {host_ip} ({host_hostname})") 
+        pg = PingGraph(
+            self.graph_frame,
+            app=self, # Pass the app instance
+            host_ip=host_ip,
+            host_hostname=host_hostname,
+        )
+        # Pack with expand=True now, refresh_graph_packs evens things out once the trace is done
+        pg.pack(fill=tk.BOTH, expand=True, padx=0, pady=1)
+        self._packed_state[host_ip] = True
+        self.ping_graphs[host_ip] = pg
+        self.ping_order.append(host_ip)
+
+        # Add toggle checkbox
+        var = tk.BooleanVar(value=True)
+        cb = tk.Checkbutton(
+            self.graph_checkbox_frame, text=short_label, font=("TkFixedFont", 7),
+            variable=var, command=lambda ip=host_ip: self.toggle_graph_visibility(ip),
+            bg="#333333", fg="white", selectcolor="#555555", borderwidth=0, highlightthickness=0,
+            padx=1, pady=0, indicatoron=False, relief=tk.RAISED, width=3 # Shorter width
+        )
+        cb.pack(side=tk.LEFT, padx=1)
+        self.graph_vars[host_ip] = (var, cb)
+
+        # Persistent workers for the rest of the run, sharing this host's job queue
+        jobs = queue.Queue()
+        self.ping_jobs[host_ip] = jobs
+        for _ in range(self._workers_per_host):
+            PingRunner(
+                host_ip, self.config.ping_timeout, self.config.ping_size,
+                jobs, self._results, self.stop_event, self._notify_result, MAX_PENDING_RESULTS).start()
+        self._rebuild_round_targets() # Pinged from the next round on
+
+        if not self.running: # First pingable hop: start the rounds
+            log.info("[INFO] First hop traced. Starting ping rounds.")
+            self.running = True
+            self._next_round_deadline = time.monotonic() # First round is due now
+            self.schedule_next_ping_round()
+
+    def _finish_traceroute(self, stop_event, target, hop_count, error):
+        """Wraps up the run once the trace has ended (Tk thread): reports a trace without pingable hops,
+        otherwise settles the layout of the graphs added while tracing."""
+        if stop_event is not self.stop_event:
+            return # A newer run has started meanwhile
         print("[TRACE] Processing traceroute results in main thread.") 
-        if hasattr(self, "status_label") and self.status_label.winfo_exists():
-            self.status_label.destroy()
+        self._status_label.pack_forget()
 
-        if self.stop_event.is_set():
+        if stop_event.is_set():
             print("[TRACE] Stop event set during traceroute, aborting.") 
             self.stop_pinging()
             return
 
-        if not hops:
+        if error is not None or hop_count == 0:
             print(f"[TRACE FAIL] Traceroute to {target} failed or returned no hops.")
-            error_label = tk.Label(self.graph_frame,text=f"Failed to trace route to {target}.\nCheck hostname or network.",bg="#222222",fg="red")
-            error_label.pack(pady=20)
+            self._show_status(f"Failed to trace route to {target}.\nCheck hostname or network.", "red")
             self.after(5000, self.stop_pinging)
             return
 
-        print(f"[TRACE SUCCESS] Traceroute completed with {len(hops)} hops.") 
-
-        for widget in self.graph_checkbox_frame.winfo_children(): widget.destroy()
-        self.graph_vars.clear()
+        print(f"[TRACE SUCCESS] Traceroute completed with {hop_count} hops.") 
 
-        valid_hops_count = 0
-        for hop_index, hop in enumerate(hops):
-            if self.stop_event.is_set(): break
-            if not hop or not hop[0]: continue
-
-            host_ip = hop[0]
-            # Ensure hostname is not None and not same as IP
-            host_hostname = hop[1] if len(hop) > 1 and hop[1] and hop[1] != host_ip else None
-            short_label = f"{hop_index+1}" # Use hop number for short label
-
-            print(f"[GRAPH] Adding PingGraph for {host_ip} ({host_hostname})") 
-            pg = PingGraph(
-                self.graph_frame,
-                app=self, # Pass the app instance
-                host_ip=host_ip,
-                host_hostname=host_hostname,
-            )
-            # Pack with expand=True now, relies on refresh_graph_packs later
-            pg.pack(fill=tk.BOTH, expand=True, padx=0, pady=1)
-            self.ping_graphs[host_ip] = pg
-            self.ping_order.append(host_ip)
-
-            # Add toggle checkbox
-            var = tk.BooleanVar(value=True)
-            cb = tk.Checkbutton(
-                self.graph_checkbox_frame, text=short_label, font=("TkFixedFont", 7),
-                variable=var, command=lambda ip=host_ip: self.toggle_graph_visibility(ip),
-                bg="#333333", fg="white", selectcolor="#555555", borderwidth=0, highlightthickness=0,
-                padx=1, pady=0, indicatoron=False, relief=tk.RAISED, width=3 # Shorter width
-            )
-            cb.pack(side=tk.LEFT, padx=1)
-            self.graph_vars[host_ip] = (var, cb)
-            valid_hops_count += 1
-
-        if self.stop_event.is_set():
-            print("[TRACE] Stop event set during graph creation, aborting.") 
-            self.stop_pinging()
-            return
-
-        if valid_hops_count == 0:
+        if not self.ping_graphs:
             print("[ERROR] No valid hops found after traceroute processing.")
-            error_label = tk.Label(self.graph_frame,text="No pingable hops found.",bg="#222222",fg="orange")
-            error_label.pack(pady=20)
+            self._show_status("No pingable hops found.", "orange")
             self.after(4000, self.stop_pinging)
             return
 
-        # Initial pack might be uneven, refresh corrects it
+        # Packs made while hops arrived might be uneven, refresh corrects it
         self.refresh_graph_packs()
-        self.update_idletasks() # Allow geometry to settle
-        # Trigger initial resize/redraw for all created graphs
+        # Resize/redraw once Tk has laid out the graphs (idle callbacks run after the pending geometry
+        # work) instead of forcing a synchronous layout pass here
+        self.after_idle(self._finalize_traceroute_layout)
+
+    def _finalize_traceroute_layout(self):
+        """Triggers the initial resize/redraw of every graph after the traceroute layout settled."""
         for pg in self.ping_graphs.values():
              pg.on_resize()
 
-        print("[INFO] All graphs added. Starting ping rounds.") 
-        self.running = True
-        self.schedule_next_ping_round()
-
     def toggle_graph_visibility(self, host_ip):
         if host_ip not in self.ping_graphs or host_ip not in self.graph_vars: return
         var, cb = self.graph_vars[host_ip]
@@ -886,143 +1132,196 @@ class PingApp(tk.Tk):
 
     def refresh_graph_packs(self):
         """Repacks visible PingGraphs ensuring they fill vertically and maintain the original traceroute order."""
-        print("[PACK] Refreshing graph packing order.") 
-
-        # 1. Temporarily hide ALL PingGraph widgets managed by this frame
-        #    This clears the current packing order within graph_frame.
-        for host_ip in self.ping_order:
-            if host_ip in self.ping_graphs:
-                pg = self.ping_graphs[host_ip]
-                if pg.winfo_ismapped(): # Only forget if currently packed
-                    pg.pack_forget()
+        log.debug("[PACK] Refreshing graph packing order.")
 
-        # 2. Iterate through the desired ping_order sequence
-        #    and re-pack only those that should be visible.
-        num_packed = 0
+        # Only graphs whose visibility flipped are touched; the others keep their place in the pack order
+        desired = {}
         for host_ip in self.ping_order:
             # Ensure the graph and its toggle variable exist
             if host_ip in self.ping_graphs and host_ip in self.graph_vars:
-                pg = self.ping_graphs[host_ip]
                 var, cb = self.graph_vars[host_ip] # Get checkbox too for relief update
+                desired[host_ip] = var.get()
+                cb.config(relief=tk.RAISED if desired[host_ip] else tk.SUNKEN) # Ensure checkbox looks correct
 
-                # Check the state of the toggle variable
-                if var.get():
-                    # If it should be visible, pack it. Since we pack sequentially
-                    # following ping_order after clearing, the order will be correct.
-                    pg.pack(fill=tk.BOTH, expand=True, padx=0, pady=1)
-                    cb.config(relief=tk.RAISED) # Ensure checkbox looks correct
-                    num_packed += 1
-                else:
-                    # Ensure checkbox looks correct even if already hidden
-                    cb.config(relief=tk.SUNKEN)
+        # 1. Hide the graphs that were switched off (all forgets before any pack)
+        for host_ip, visible in desired.items():
+            if not visible and self._packed_state.get(host_ip):
+                self.ping_graphs[host_ip].pack_forget()
+                self._packed_state[host_ip] = False
 
+        # 2. Show the graphs that were switched on. Walking ping_order backwards, the next visible graph
+        #    is already packed, so packing 'before' it puts the new one in its traceroute position.
+        num_packed = 0
+        next_visible = None
+        for host_ip in reversed(self.ping_order):
+            if not desired.get(host_ip): continue
+            pg = self.ping_graphs[host_ip]
+            if not self._packed_state.get(host_ip):
+                if next_visible is not None:
+                    pg.pack(fill=tk.BOTH, expand=True, padx=0, pady=1, before=next_visible)
+                else:
+                    pg.pack(fill=tk.BOTH, expand=True, padx=0, pady=1)
+                self._packed_state[host_ip] = True
+                num_packed += 1
+            next_visible = pg
 
-        print(f"[PACK] Re-packed {num_packed} visible graphs in order.") 
+        log.debug("[PACK] Packed %s newly visible graphs in order.", num_packed)
 
         # Optional: might help prevent visual glitches after toggling, but often not necessary
         # self.update_idletasks()
         
     def schedule_next_ping_round(self):
-        """Schedules the next batch of pings and records timestamp."""
+        """The app's single timer tick: drains pending results, starts the next batch of pings and records its timestamp."""
         if self._scheduled_ping_after_id:
             self.after_cancel(self._scheduled_ping_after_id)
             self._scheduled_ping_after_id = None
 
         if not self.running or self.stop_event.is_set():
-            print("[SCHEDULER] Pinging stopped.") 
+            log.debug("[SCHEDULER] Pinging stopped.")
             self.running = False
             if hasattr(self, "start_button"): self.start_button.config(state=tk.NORMAL)
             if hasattr(self, "stop_button"): self.stop_button.config(state=tk.DISABLED)
             return
 
+        # --- Drain Results ---
+        # Normally drained as soon as <<PingResult>> arrives; this catches anything whose event
+        # couldn't be posted, so no result waits longer than one round
+        if self._results:
+            self.process_ping_results()
+
         # --- Record Timestamp for this Round ---
-        current_round_time = time.time()
+        current_round_time = time.time() # Wall clock, for display; scheduling uses time.monotonic()
         self.ping_timestamps.append(current_round_time)
         current_round_index = self.ping_round_index # Index corresponds to timestamp list
 
         # --- Start Pings ---
-        print(f"[ROUND {current_round_index}] Scheduling pings @ {current_round_time:.2f}") 
-        hosts_to_ping = list(self.ping_graphs.keys())
-        if not hosts_to_ping:
-            print("[SCHEDULER] No hosts to ping. Stopping.") 
+        log.debug("[ROUND %s] Scheduling pings @ %.2f", current_round_index, current_round_time)
+        round_targets = self._round_targets # Cached, no per-round copy of the graph dict or per-host lookups
+        stop_event = self.stop_event
+        rate = self.config.ping_rate
+        if not round_targets:
+            log.debug("[SCHEDULER] No hosts to ping. Stopping.")
             self.stop_pinging()
             return
 
-        active_threads = []
-        for host_ip in hosts_to_ping:
-            if self.stop_event.is_set(): break
-            print(f"[PING START {host_ip}] Round {current_round_index}") 
-            runner = PingRunner(
-                host_ip, self.config.ping_timeout, self.config.ping_size,
-                self.config.ping_rate, self.result_queue,
-                current_round_index, # Pass the index for this round
-                self.stop_event)
-            runner.start()
-            active_threads.append(runner)
+        debug = log.isEnabledFor(logging.DEBUG) # Checked once per round instead of once per host
+        workers = self._workers_per_host
+        for host_ip, jobs in round_targets:
+            if stop_event.is_set(): break
+            if jobs.qsize() >= workers:
+                # Every worker of this host is still stuck in a ping and as many rounds wait for them:
+                # skip the round for this host instead of letting its backlog grow without limit
+                if debug: log.debug("[PING SKIP %s] Round %s, workers busy", host_ip, current_round_index)
+                continue
+            if debug: log.debug("[PING START %s] Round %s", host_ip, current_round_index)
+            jobs.put_nowait(current_round_index) # Picked up by a waiting PingRunner
 
         self.ping_round_index += 1 # Increment for the *next* round
 
         # --- Schedule Next ---
-        delay_ms = max(10, int(1000 / self.config.ping_rate))
-        print(f"[SCHEDULER] Next round in {delay_ms} ms") 
+        # Deadlines advance by exactly one period, so a late callback shortens the next delay instead
+        # of shifting every following round (no drift). After a long stall (e.g. system sleep) the
+        # schedule restarts from now rather than firing a burst of catch-up rounds.
+        period = 1.0 / rate
+        now = time.monotonic()
+        self._next_round_deadline += period
+        if self._next_round_deadline < now - period:
+            self._next_round_deadline = now + period
+        delay_ms = max(1, int((self._next_round_deadline - now) * 1000))
+        log.debug("[SCHEDULER] Next round in %s ms", delay_ms)
         self._scheduled_ping_after_id = self.after(delay_ms, self.schedule_next_ping_round)
 
         # --- Periodic Cleanup ---
         if (current_round_index > 10 and current_round_index % 100 == 0):
-            print("[MAINTENANCE] Scheduling check for unpingable graphs...") 
+            log.debug("[MAINTENANCE] Scheduling check for unpingable graphs...")
             self.after(1000, self.clean_unpingable)
 
+    def round_timestamp(self, round_idx):
+        """Returns the start time of ping round 'round_idx', or None if it is too old to be remembered."""
+        i = round_idx - (self.ping_round_index - len(self.ping_timestamps))
+        if 0 <= i < len(self.ping_timestamps):
+            return self.ping_timestamps[i]
+        return None
+
     def clean_unpingable(self):
         if not self.running: return
         print("[CLEANUP] Checking for unresponsive graphs...") 
-        remove_ips, kept_ips = [], []
         if len(self.ping_graphs) <= 1: return
 
-        for ip, pg in list(self.ping_graphs.items()):
-            # Use the incremental stats: check if stat_count is 0 after enough attempts
-            if pg.stat_count == 0 and (pg.stat_count + pg.stat_loss_count) > 10:
-                print(f"[REMOVE] {ip} marked (never successful after {len(pg.pings)} attempts)") 
-                remove_ips.append(ip)
-            else:
-                kept_ips.append(ip)
+        # Only hops flagged by PingGraph (no success after UNRESPONSIVE_AFTER attempts) need checking
+        remove_ips = []
+        for ip in list(self._unresponsive_candidates):
+            pg = self.ping_graphs.get(ip)
+            if pg is None or pg.stat_count > 0: # Gone, or answered since it was flagged
+                self._unresponsive_candidates.discard(ip)
+                continue
+            print(f"[REMOVE] {ip} marked (never successful after {pg.stat_loss_count} attempts)") 
+            remove_ips.append(ip)
 
         if not remove_ips: return
-        if len(kept_ips) == 0 and len(remove_ips) > 0:
+        if len(remove_ips) == len(self.ping_graphs):
              print("[CLEANUP] All graphs unresponsive, keeping.") 
-             return
+             return # Still flagged, so they are checked again next time
 
         print(f"[CLEANUP] Removing {len(remove_ips)} graphs: {remove_ips}") 
         for ip in remove_ips:
+            self._unresponsive_candidates.discard(ip)
+            self._stop_workers(ip)
             if ip in self.ping_graphs: self.ping_graphs.pop(ip).destroy()
+            self._packed_state.pop(ip, None)
             if ip in self.graph_vars: self.graph_vars.pop(ip)[1].destroy() # Destroy checkbox
             if ip in self.ping_order:
                 try: self.ping_order.remove(ip)
                 except ValueError: pass
+        self._rebuild_round_targets()
         self.refresh_graph_packs()
 
-    def process_ping_results(self): # Added round_idx processing (though not used directly here yet)
-        """Processes results from the queue and updates graphs."""
+    def _notify_result(self):
+        """Called from PingRunner threads after appending a result. Posts one <<PingResult>> at a time;
+        results appended before it is handled are drained by the same process_ping_results."""
+        if self._result_event_pending: return
+        self._result_event_pending = True
         try:
-            while True:
-                host_ip, round_idx, ping_value = self.result_queue.get_nowait()
-                print(f"[RESULT] {host_ip} Round {round_idx}: {ping_value}") 
-                if host_ip in self.ping_graphs:
-                     # Add the value (could be float, None, False)
-                     self.ping_graphs[host_ip].add_ping(ping_value)
-                # else: print(f"[WARN] Received result for unknown/removed host: {host_ip}") 
-        except queue.Empty:
-            pass
-        except Exception as e:
-            print(f"[ERROR] Exception in process_ping_results: {e}")
-            import traceback
-            traceback.print_exc() # Print full traceback for debugging
-
-        self.after(50, self.process_ping_results) # Reschedule check
+            self.event_generate("<<PingResult>>", when="tail")
+        except (tk.TclError, RuntimeError): # App is closing or the main loop isn't running
+            self._result_event_pending = False
+
+    def process_ping_results(self, event=None):
+        """Processes results from the queue and updates graphs (bound to <<PingResult>>)."""
+        # Cleared before draining: a result appended from here on posts a new event
+        self._result_event_pending = False
+        if not self.running or not self.ping_graphs:
+            return # Nothing to feed (traceroute pending or stopped)
+
+        results = self._results
+        pending = collections.defaultdict(list) # host_ip -> [(value, timestamp), ...] drained this pass
+        debug = log.isEnabledFor(logging.DEBUG) # Checked once per drain instead of once per result
+        try:
+            # Drain only what is queued right now (bounded work per pass, no Empty exceptions);
+            # results appended meanwhile post a new <<PingResult>> and are handled next pass
+            for _ in range(len(results)):
+                host_ip, round_idx, ping_value = results.popleft()
+                if debug: log.debug("[RESULT] %s Round %s: %s", host_ip, round_idx, ping_value)
+                # Group by host (value could be float, None, False)
+                pending[host_ip].append((ping_value, self.round_timestamp(round_idx)))
+
+            # One batch per graph; each schedules a single deferred repaint for everything drained above
+            for host_ip, batch in pending.items():
+                pg = self.ping_graphs.get(host_ip)
+                if pg is not None:
+                    pg.add_ping_batch(batch)
+                # else: log.debug("[WARN] Received result for unknown/removed host: %s", host_ip)
+        except Exception:
+            log.exception("[ERROR] Exception in process_ping_results") # Logs the full traceback for debugging
 
     def stop_pinging(self, clear_ui=True):
         print("[STOP] Stopping ping process...") 
         self.running = False
-        self.stop_event.set()
+        self.stop_event.set() # In-flight runners see this and drop their result
+        self._results.clear()
+        # Wake idle workers so they exit; pings already in flight finish on their own
+        for host_ip in list(self.ping_jobs):
+            self._stop_workers(host_ip)
 
         if self._scheduled_ping_after_id:
             self.after_cancel(self._scheduled_ping_after_id)
@@ -1034,8 +1333,7 @@ class PingApp(tk.Tk):
             self._restore_normal_mode()       # Restore normal view settings
 
         if clear_ui:
-            for widget in self.graph_frame.winfo_children(): widget.destroy()
-            for widget in self.graph_checkbox_frame.winfo_children(): widget.destroy()
+            self._clear_graph_frame()
             self.graph_vars.clear()
 
             self.status_frame.pack_forget()
@@ -1051,10 +1349,24 @@ class PingApp(tk.Tk):
 
         # Clear internal state (keep config)
         self.ping_graphs.clear()
+        self._packed_state.clear()
+        self._unresponsive_candidates.clear()
         self.ping_order.clear()
+        self._round_targets = ()
         self.ping_timestamps.clear()
         print("[STOP] Pinging stopped.") 
 
+    def _rebuild_round_targets(self):
+        """Refreshes the (host_ip, job queue) pairs schedule_next_ping_round feeds every round."""
+        self._round_targets = tuple((ip, self.ping_jobs[ip]) for ip in self.ping_order if ip in self.ping_jobs)
+
+    def _stop_workers(self, host_ip):
+        """Sends every PingRunner of 'host_ip' its exit sentinel and forgets the host's job queue."""
+        jobs = self.ping_jobs.pop(host_ip, None)
+        if jobs is None: return
+        for _ in range(self._workers_per_host):
+            jobs.put_nowait(None)
+
     def toggle_compact_mode(self):
         """Called when the 'On Top' checkbox is clicked."""
         if self.always_on_top_var.get():
@@ -1068,41 +1380,41 @@ class PingApp(tk.Tk):
 
 
     def _enter_compact_mode(self):
-            """Apply settings for compact 'On Top' mode."""
-            print("[UI] Entering Compact Mode") 
-            if self.is_compact_mode: return # Already compact
-
-            # --- Store Original State ---
-            self.original_geometry = self.geometry()
-            # REMOVED: self.original_overrideredirect = self.overrideredirect() # Not needed, assume default is False
-            try: # Reading alpha might fail on some platforms if never set
-                self.original_alpha = self.attributes('-alpha')
-            except tk.TclError:
-                self.original_alpha = 1.0 # Assume default
-
-            # --- Apply Compact Settings ---
-            self.attributes("-topmost", True)     # Always on top
-            self.overrideredirect(True)           # Hide title bar/borders
-            self.geometry('250x70')              # Fixed size
-            self.attributes("-alpha", 0.50)       # Semi-transparent
-
-            # Hide controls within the status frame (Stop button, Graph toggles)
-            if self.stop_button.winfo_ismapped():
-                self.stop_button.pack_forget()
-            if self.graph_checkbox_frame.winfo_ismapped():
-                self.graph_checkbox_frame.pack_forget()
-
-            # Handle graph labels based on preference
-            if self.compact_mode_label_behavior == 'hide':
-                for pg in self.ping_graphs.values():
-                    pg.set_label_visibility(False)
-            elif self.compact_mode_label_behavior == 'tiny':
-                for pg in self.ping_graphs.values():
-                    pg.set_label_font('tiny')
-                    pg.set_label_visibility(True) # Ensure visible if tiny
-
-            self.is_compact_mode = True
-            self.update_idletasks() # Allow UI to redraw
+        """Apply settings for compact 'On Top' mode."""
+        print("[UI] Entering Compact Mode") 
+        if self.is_compact_mode: return # Already compact
+
+        # --- Store Original State ---
+        self.original_geometry = self.geometry()
+        # REMOVED: self.original_overrideredirect = self.overrideredirect() # Not needed, assume default is False
+        try: # Reading alpha might fail on some platforms if never set
+            self.original_alpha = self.attributes('-alpha')
+        except tk.TclError:
+            self.original_alpha = 1.0 # Assume default
+
+        # --- Apply Compact Settings ---
+        self.attributes("-topmost", True)     # Always on top
+        self.overrideredirect(True)           # Hide title bar/borders
+        self.geometry('250x70')              # Fixed size
+        self.attributes("-alpha", 0.50)       # Semi-transparent
+
+        # Hide controls within the status frame (Stop button, Graph toggles)
+        if self.stop_button.winfo_ismapped():
+            self.stop_button.pack_forget()
+        if self.graph_checkbox_frame.winfo_ismapped():
+            self.graph_checkbox_frame.pack_forget()
+
+        # Handle graph labels based on preference
+        if self.compact_mode_label_behavior == 'hide':
+            for pg in self.ping_graphs.values():
+                pg.set_label_visibility(False)
+        elif self.compact_mode_label_behavior == 'tiny':
+            for pg in self.ping_graphs.values():
+                pg.set_label_font('tiny')
+                pg.set_label_visibility(True) # Ensure visible if tiny
+
+        self._bind_drag()
+        self.is_compact_mode = True # Tk redraws on its next idle pass
 
     def _restore_normal_mode(self):
         """Restore settings when leaving compact 'On Top' mode."""
@@ -1143,25 +1455,52 @@ class PingApp(tk.Tk):
             pg.set_label_font('normal') # Restore normal font size
             pg.set_label_visibility(True) # Ensure labels are visible
 
+        self._unbind_drag()
         self.is_compact_mode = False
-        self.update_idletasks()
 
     # --- Methods for dragging borderless window ---
+    def _bind_drag(self):
+        """Binds dragging of the borderless window; only done in compact mode, so normal mode
+        mouse events over the status bar don't dispatch any Python callback."""
+        self._unbind_drag()
+        # Also bind the checkbox itself, otherwise clicking it might not start drag
+        for widget in (self.status_frame, self.always_on_top_check):
+            for sequence, handler in (("<Button-1>", self._start_drag), ("<B1-Motion>", self._do_drag)):
+                self._drag_binds.append((widget, sequence, widget.bind(sequence, handler, add="+")))
+
+    def _unbind_drag(self):
+        """Removes the bindings made by _bind_drag (and drops a move that hasn't been applied yet)."""
+        if self._drag_after_id is not None:
+            self.after_cancel(self._drag_after_id)
+            self._drag_after_id = None
+        self._pending_drag_xy = None
+        for widget, sequence, funcid in self._drag_binds:
+            widget.unbind(sequence, funcid)
+        self._drag_binds.clear()
+
     def _start_drag(self, event):
         """Records the initial mouse offset when dragging starts."""
-        if self.is_compact_mode: # Only allow dragging in compact mode
-             self._drag_offset_x = event.x
-             self._drag_offset_y = event.y
+        self._drag_offset_x = event.x
+        self._drag_offset_y = event.y
 
     def _do_drag(self, event):
         """Moves the window based on mouse movement."""
-        if self.is_compact_mode: # Only allow dragging in compact mode
-             # Calculate new window top-left coordinates
-             new_x = self.winfo_x() + (event.x - self._drag_offset_x)
-             new_y = self.winfo_y() + (event.y - self._drag_offset_y)
-             # Apply the new geometry (position part only)
-             # Keep the fixed size of compact mode
-             self.geometry(f'250x70+{new_x}+{new_y}')
+        # Calculate new window top-left coordinates
+        new_x = self.winfo_x() + (event.x - self._drag_offset_x)
+        new_y = self.winfo_y() + (event.y - self._drag_offset_y)
+        # Motion events can outpace the window manager; only the latest position is applied, once Tk is idle
+        self._pending_drag_xy = (new_x, new_y)
+        if self._drag_after_id is None:
+            self._drag_after_id = self.after_idle(self._apply_drag)
+
+    def _apply_drag(self):
+        """Moves the window to the last position requested by _do_drag."""
+        self._drag_after_id = None
+        if self._pending_drag_xy is None: return
+        x, y = self._pending_drag_xy
+        self._pending_drag_xy = None
+        # Position-only geometry: the fixed compact size is left alone, so Tk has no resize to process
+        self.wm_geometry(f'+{x}+{y}')
 
 
     def on_close(self):
@@ -1176,8 +1515,7 @@ class PingApp(tk.Tk):
 
 
 if __name__ == "__main__":
-    config_parser = Config()
-    args = config_parser.parse_args()
+    args = load_config() # Skips building the argument parser for plain launches
     app = PingApp(args)
     app.protocol("WM_DELETE_WINDOW", app.on_close)
     try:
@@ -1,4 +1,19 @@
 import argparse
+import sys
+from types import SimpleNamespace
+
+_UNSET = object() # Marks options not given on the command line while parsing, see Config.parse_args
+
+# Default value of every option, shared by the full parser and the fast path in load_config
+DEFAULTS = {
+    "domain": "google.com",
+    "ping_rate": 1.0,
+    "ping_timeout": 1.0,
+    "ping_size": 1,
+    "bad_threshold": 100,
+    "so_bad_threshold": 200,
+    "start": False,
+}
 
 
 class Config(argparse.ArgumentParser):
@@ -10,13 +25,14 @@ class Config(argparse.ArgumentParser):
         super().__init__(
             description="A terminal UI tool to continuously ping a target host and visualize latency in real-time, with configurable rates, timeouts, and color-coded thresholds.",
             formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+            fromfile_prefix_chars="@", # 'PingTracer--.py @pings.conf' reads arguments from a file
         )
 
         self.add_argument(
             "--domain",
             "--d",
             type=str,
-            default="google.com",
+            default=DEFAULTS["domain"],
             metavar="DOMAIN",
             help="The domain or IP address to ping.",
         )
@@ -26,7 +42,7 @@ class Config(argparse.ArgumentParser):
             "--ping-rate",
             "-r",
             type=float,
-            default=1.0,
+            default=DEFAULTS["ping_rate"],
             metavar="RATE",
             help="Number of pings per second.",
         )
@@ -36,7 +52,7 @@ class Config(argparse.ArgumentParser):
             "--ping-timeout",
             "-t",
             type=float,
-            default=1.0,
+            default=DEFAULTS["ping_timeout"],
             metavar="SECONDS",
             help="Timeout for each ping in seconds.",
         )
@@ -46,7 +62,7 @@ class Config(argparse.ArgumentParser):
             "--ping-size",
             "-s",
             type=int,
-            default=1,
+            default=DEFAULTS["ping_size"],
             metavar="BYTES",
             help="Payload size for each ping in bytes.",
         )
@@ -56,7 +72,7 @@ class Config(argparse.ArgumentParser):
             "--bad-threshold",
             "-b",
             type=int,
-            default=100,
+            default=DEFAULTS["bad_threshold"],
             metavar="MS",
             help="Latency threshold (ms) to consider a ping 'bad' (e.g., yellow).",
         )
@@ -66,7 +82,7 @@ class Config(argparse.ArgumentParser):
             "--so-bad-threshold",
             "-B",
             type=int,
-            default=200,
+            default=DEFAULTS["so_bad_threshold"],
             metavar="MS",
             help="Latency threshold (ms) to consider a ping 'so bad' (e.g., red).",
         )
@@ -78,3 +94,117 @@ class Config(argparse.ArgumentParser):
             action="store_true",
             help="If present, indicates that the process should auto start",
         )
+
+        # config file input/output
+        self.add_argument(
+            "--config",
+            type=str,
+            default=None,
+            metavar="FILE",
+            help="TOML file with option values (e.g. 'ping_rate = 5'), and per-domain overrides in "
+            "[targets.\"<domain>\"] tables. Options given on the command line take precedence.",
+        )
+        self.add_argument(
+            "--dump-config",
+            action="store_true",
+            help="Print the resulting options as an @file (one '--flag value' per line) and exit.",
+        )
+
+    def convert_arg_line_to_args(self, arg_line):
+        """Lets an @file line hold several whitespace-separated arguments ('--ping-rate 5'); '#' starts a comment."""
+        return arg_line.split("#", 1)[0].split()
+
+    def parse_args(self, args=None, namespace=None):
+        if namespace is None:
+            # argparse only fills in defaults for attributes the namespace doesn't have yet, so options
+            # still _UNSET after the (single) parse were not given on the command line
+            namespace = argparse.Namespace(**dict.fromkeys(DEFAULTS, _UNSET))
+        parsed = super().parse_args(args, namespace)
+        values = {}
+        if parsed.config:
+            # Config file values fill in what the command line left out; the domain's [targets] table
+            # applies on top, once the domain itself is known
+            table = self.read_config_file(parsed.config)
+            targets = table.pop("targets", {})
+            if not isinstance(targets, dict):
+                self.error(f"{parsed.config}: 'targets' must be a table of per-domain options")
+            values = self.config_values(parsed.config, table)
+            domain = parsed.domain if parsed.domain is not _UNSET else values.get("domain", DEFAULTS["domain"])
+            if domain in targets:
+                values.update(self.config_values(parsed.config, targets[domain]))
+        for dest in DEFAULTS:
+            if getattr(parsed, dest, None) is _UNSET:
+                setattr(parsed, dest, values.get(dest, self.get_default(dest)))
+        dump = parsed.dump_config
+        del parsed.dump_config
+        if dump:
+            print(self.format_config(parsed))
+            self.exit()
+        return parsed
+
+    def read_config_file(self, path):
+        """Returns the TOML document at 'path' as a dict, exiting with a usage error if it can't be read."""
+        try:
+            import tomllib # Python 3.11+
+        except ModuleNotFoundError:
+            try:
+                import tomli as tomllib
+            except ModuleNotFoundError:
+                self.error("--config needs Python 3.11+ or the 'tomli' package")
+        try:
+            with open(path, "rb") as f:
+                return tomllib.load(f)
+        except OSError as e:
+            self.error(f"can't read config file: {e}")
+        except tomllib.TOMLDecodeError as e:
+            self.error(f"invalid config file {path}: {e}")
+
+    def config_values(self, path, table):
+        """Checks the options in a config file table against the parser; returns them as {dest: value}."""
+        actions = {action.dest: action for action in self._actions if action.dest in DEFAULTS}
+        values = {}
+        for key, value in table.items():
+            action = actions.get(key.replace("-", "_")) # Both 'ping_rate' and 'ping-rate' are accepted
+            if action is None or isinstance(value, dict):
+                self.error(f"{path}: unknown option '{key}'")
+            if action.nargs == 0: # store_true flags
+                if not isinstance(value, bool):
+                    self.error(f"{path}: '{key}' must be true or false")
+            else:
+                # No coercion beyond int -> float: a float for an int option (bad_threshold = 150.7)
+                # or a string for a number is rejected rather than silently converted
+                accepted = (int, float) if action.type is float else action.type
+                if isinstance(value, bool) or not isinstance(value, accepted):
+                    self.error(f"{path}: '{key}' must be of type {action.type.__name__}, got {value!r}")
+                value = action.type(value)
+            values[action.dest] = value
+        return values
+
+    def format_config(self, parsed):
+        """Formats 'parsed' options as @file lines that parse back to the same values."""
+        lines = []
+        for action in self._actions:
+            if action.dest not in DEFAULTS:
+                continue
+            flag = action.option_strings[0]
+            value = getattr(parsed, action.dest)
+            if action.nargs == 0: # store_true flags take no value
+                if value:
+                    lines.append(flag)
+            else:
+                lines.append(f"{flag} {value}")
+        return "\n".join(lines)
+
+
+def load_config(argv=None):
+    """Returns the configuration for 'argv' (default: sys.argv[1:]).
+    The common launches (no arguments, or only a domain) are answered from DEFAULTS without building
+    the argument parser; anything else, including --help and invalid input, goes through Config."""
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        return SimpleNamespace(**DEFAULTS)
+    # A value starting with '@' is an @file argparse expands (fromfile_prefix_chars), not a domain
+    if len(argv) == 2 and argv[0] in ("--domain", "--d") and not argv[1].startswith(("-", "@")):
+        return SimpleNamespace(**dict(DEFAULTS, domain=argv[1]))
+    return Config().parse_args(argv)
@@ -0,0 +1,78 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DEFAULTS, Config, load_config
+
+CONFIG_FILE = """
+ping_rate = 5
+bad_threshold = 150
+
+[targets."example.org"]
+ping_rate = 8
+so-bad-threshold = 400
+"""
+
+
+class ConfigTest(unittest.TestCase):
+    def write(self, text, suffix=".toml"):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def parse(self, *args):
+        return Config().parse_args(list(args))
+
+    def assertRejected(self, *args):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            self.parse(*args)
+
+    def test_defaults(self):
+        parsed = self.parse()
+        for dest, value in DEFAULTS.items():
+            self.assertEqual(getattr(parsed, dest), value, dest)
+
+    def test_precedence(self):
+        path = self.write(CONFIG_FILE)
+        # Top-level table over defaults
+        parsed = self.parse("--config", path)
+        self.assertEqual((parsed.ping_rate, parsed.bad_threshold, parsed.so_bad_threshold), (5.0, 150, 200))
+        # The domain's [targets] table over the top-level one
+        parsed = self.parse("--config", path, "--domain", "example.org")
+        self.assertEqual((parsed.ping_rate, parsed.bad_threshold, parsed.so_bad_threshold), (8.0, 150, 400))
+        # Command line over both, even when it gives the default value
+        parsed = self.parse("--config", path, "--domain", "example.org", "-r", "1", "-B", "300")
+        self.assertEqual((parsed.ping_rate, parsed.bad_threshold, parsed.so_bad_threshold), (1.0, 150, 300))
+
+    def test_domain_from_config_file_selects_its_target_table(self):
+        path = self.write('domain = "example.org"\n' + CONFIG_FILE)
+        parsed = self.parse("--config", path)
+        self.assertEqual((parsed.domain, parsed.ping_rate), ("example.org", 8.0))
+
+    def test_int_accepted_for_float_option(self):
+        parsed = self.parse("--config", self.write("ping_timeout = 2"))
+        self.assertIsInstance(parsed.ping_timeout, float)
+        self.assertEqual(parsed.ping_timeout, 2.0)
+
+    def test_mistyped_values_are_rejected(self):
+        for line in ("bad_threshold = 150.7", 'ping_rate = "fast"', "ping_size = true", "start = 1",
+                     "unknown_option = 1", "targets = 5"):
+            with self.subTest(line=line):
+                self.assertRejected("--config", self.write(line))
+
+    def test_load_config_fast_path_matches_parser(self):
+        fast, full = load_config(["--domain", "example.org"]), self.parse("--domain", "example.org")
+        for dest in DEFAULTS:
+            self.assertEqual(getattr(fast, dest), getattr(full, dest), dest)
+        path = self.write("example.org\n", suffix=".conf")
+        self.assertEqual(load_config(["--domain", "@" + path]).domain, "example.org")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import importlib.util
+import os
+import sys
+import types
+import unittest
+
+import tkinter as tk
+
+# The app is a script with a non-importable file name, load it by path (its own imports come from the repo root)
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _ROOT)
+_SCRIPT = os.path.join(_ROOT, "PingTracer--.py")
+_spec = importlib.util.spec_from_file_location("pingtracer", _SCRIPT)
+pingtracer = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(pingtracer)
+
+
+class PingGraphRingTest(unittest.TestCase):
+    def setUp(self):
+        try:
+            self.root = tk.Tk()
+        except tk.TclError as e:
+            self.skipTest(f"no display: {e}")
+        self.root.withdraw()
+        self.app = types.SimpleNamespace(
+            config=types.SimpleNamespace(bad_threshold=100, so_bad_threshold=200),
+            is_compact_mode=False,
+            compact_mode_label_behavior="hide",
+            _unresponsive_candidates=set(),
+        )
+
+    def tearDown(self):
+        self.root.destroy()
+
+    def test_wraps_on_graphs_at_least_history_wide(self):
+        for width in (800, pingtracer.PING_HISTORY, 1500):
+            with self.subTest(width=width):
+                graph = pingtracer.PingGraph(self.root, self.app, "192.0.2.1")
+                graph.on_resize(types.SimpleNamespace(width=width, height=5))
+                extra = 37
+                for i in range(width + extra):
+                    graph.add_ping(10.0, float(i))
+
+                # The oldest visible ping is the one 'extra' pings in, the newest is the last one
+                self.assertEqual(graph.col_head, extra)
+                self.assertEqual(graph.ping_at_column(0), (10.0, float(extra)))
+                self.assertEqual(graph.ping_at_column(width - 1), (10.0, float(width + extra - 1)))
+                graph.destroy()
+
+    def test_ping_added_on_buffer_mismatch_is_drawn_once(self):
+        graph = pingtracer.PingGraph(self.root, self.app, "192.0.2.1")
+        graph._known_canvas_size = (50, 5) # As left by a <Configure> the buffer hasn't caught up with
+        for value in (10.0, 20.0, 30.0):
+            graph.add_ping(value)
+        self.assertEqual(graph.col_pings[:4], [10.0, 20.0, 30.0, None])
+        self.assertEqual(graph.current_buffer_index, 3)
+
+        graph._known_canvas_size = (60, 5)
+        graph.add_ping(40.0)
+        self.assertEqual(graph.col_pings[:5], [10.0, 20.0, 30.0, 40.0, None])
+        graph.destroy()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import io
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import traceroute_tool
+from traceroute_tool import Hop
+
+TRACERT_OUTPUT = """
+Tracing route to example.org [93.184.216.34]
+over a maximum of 30 hops:
+
+  1    <1 ms    <1 ms    <1 ms  192.168.1.1
+  2     *        *        *     Request timed out.
+  3    12 ms    11 ms    13 ms  10.0.0.1
+  4     *       14 ms    15 ms  2001:db8:0:0::1
+  5     *        *        *     Request timed out.
+
+Trace complete.
+"""
+
+TRACEROUTE_OUTPUT = """traceroute to example.org (93.184.216.34), 30 hops max, 60 byte packets
+ 1  192.168.1.1  0.512 ms  0.463 ms  0.441 ms
+ 2  * * *
+ 3  * 10.0.0.1  12.104 ms  11.950 ms
+ 4  2001:db8:0:0::1  14.2 ms  14.0 ms  14.1 ms
+ 5  * * *
+"""
+
+
+class FakePopen:
+    """Stands in for subprocess.Popen, replaying 'output' as the trace command's stdout."""
+    output = ""
+    returncode = 0
+
+    def __init__(self, command, **kwargs):
+        self.command = command
+        self.stdout = io.StringIO(self.output)
+        self.stderr = io.StringIO("")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class HopLineTest(unittest.TestCase):
+    def match_ip(self, pattern, line):
+        m = pattern.match(line)
+        return traceroute_tool._make_hop(m["ip"]).ip if m else "no match"
+
+    def test_tracert_lines(self):
+        pattern = traceroute_tool._WIN_HOP_RE
+        self.assertEqual(self.match_ip(pattern, "  1    <1 ms    <1 ms    <1 ms  192.168.1.1\n"), "192.168.1.1")
+        self.assertEqual(self.match_ip(pattern, "  3    12 ms    11 ms    13 ms  10.0.0.1  \r\n"), "10.0.0.1")
+        self.assertEqual(self.match_ip(pattern, "  4     *       14 ms    15 ms  2001:db8:0:0::1\n"), "2001:db8::1")
+        self.assertIsNone(self.match_ip(pattern, "  2     *        *        *     Request timed out.\n"))
+        for line in ("Tracing route to example.org [93.184.216.34]\n", "over a maximum of 30 hops:\n",
+                     "\n", "Trace complete.\n"):
+            self.assertEqual(self.match_ip(pattern, line), "no match", line)
+
+    def test_traceroute_lines(self):
+        pattern = traceroute_tool._UNIX_HOP_RE
+        self.assertEqual(self.match_ip(pattern, " 1  192.168.1.1  0.512 ms  0.463 ms  0.441 ms\n"), "192.168.1.1")
+        self.assertEqual(self.match_ip(pattern, " 3  * 10.0.0.1  12.104 ms  11.950 ms\n"), "10.0.0.1")
+        self.assertEqual(self.match_ip(pattern, "12  2001:db8:0:0::1  14.2 ms  14.0 ms\n"), "2001:db8::1")
+        self.assertIsNone(self.match_ip(pattern, " 2  * * *\n"))
+        self.assertEqual(self.match_ip(pattern, "traceroute to example.org (93.184.216.34), 30 hops max\n"),
+                         "no match")
+
+
+class IterHopsTest(unittest.TestCase):
+    def trace(self, windows, output):
+        traceroute_tool.iter_hops.cache_clear()
+        FakePopen.output = output
+        with mock.patch.object(traceroute_tool, "_IS_WINDOWS", windows), \
+                mock.patch("subprocess.Popen", FakePopen):
+            return traceroute_tool.trace_route("example.org", no_resolve=True)
+
+    def test_tracert_output(self):
+        # Unanswered hops between answering ones are kept as Hop(None), trailing ones are left out
+        self.assertEqual(self.trace(True, TRACERT_OUTPUT),
+                         [Hop("192.168.1.1"), Hop(None), Hop("10.0.0.1"), Hop("2001:db8::1")])
+
+    def test_traceroute_output(self):
+        self.assertEqual(self.trace(False, TRACEROUTE_OUTPUT),
+                         [Hop("192.168.1.1"), Hop(None), Hop("10.0.0.1"), Hop("2001:db8::1")])
+
+    def test_repeated_and_skipped_hop_numbers(self):
+        output = (" 1  192.168.1.1  0.5 ms\n"
+                  " 1  192.168.1.254  0.6 ms\n" # Repeated: the first line for a hop counts
+                  " 4  10.0.0.4  9.0 ms\n") # Skipped 2 and 3: they did not answer
+        self.assertEqual(self.trace(False, output), [Hop("192.168.1.1"), Hop(None), Hop(None), Hop("10.0.0.4")])
+
+    def test_failed_command_raises(self):
+        with mock.patch.object(FakePopen, "returncode", 1):
+            with self.assertRaises(RuntimeError):
+                self.trace(False, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
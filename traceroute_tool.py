@@ -1,10 +1,134 @@
-import subprocess
-import platform
 import re
+import time
+import functools
+import collections
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Hashable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 
-def trace_route(target, max_hops=None, no_resolve=False, ipv4=True, ipv6=False, timeout=None, source=None, gateway=None):
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+class Hop(NamedTuple):
+    """One hop of a traced route; ip is None for a hop that did not answer."""
+    ip: Optional[str]
+    hostname: Optional[str] = None # Only set when it resolved to something other than the ip
+
+# Hop line patterns, one per OS, compiled once. Each parses a whole hop line in a single match.
+# Traces always run numeric (/d / -n), so a hop line only ever carries a bare address, never
+# "hostname [ip]" / "hostname (ip)". The ip group only takes the token (IPv4 or IPv6 alike);
+# _make_hop validates it with ipaddress, so a hop line without one (e.g. "Request timed out." or
+# "* * *") ends up with no ip.
+# They are matched against each output line as it arrives; whitespace is [ \t] rather than \s so
+# the trailing newline is never taken as a separator. Surrounding whitespace sits outside the
+# groups, so the ip comes back already trimmed and lines are matched as read, without strip().
+_WIN_PROBES = r'^[ \t]*(?P<hop>\d+)(?:[ \t]+(?:\*|\S+[ \t]+ms)){3}' # Hop number and exactly three probes ("*" or "<n> ms")
+_WIN_HOP_RE = re.compile(_WIN_PROBES + r'(?:[ \t]+(?:.*?[ \t]+)?(?P<ip>\S+))?[ \t\r]*$', re.IGNORECASE)
+_UNIX_PROBES = r'^[ \t]*(?P<hop>\d+)[ \t]+(?:\*[ \t]+)*' # Hop number, then any probes that got no reply before the first host
+_UNIX_HOP_RE = re.compile(_UNIX_PROBES + r'(?P<ip>\S+)?')
+
+# trace_route options -> command line, per OS: (parameter, flag, fmt). fmt turns the value into the
+# arguments following the flag; None marks a switch that is passed when the parameter is truthy.
+_WIN_FLAGS = (
+    ('max_hops', '/h', lambda v: [str(v)]),
+    ('no_resolve', '/d', None),
+    ('ipv4', '/4', None),
+    ('ipv6', '/6', None),
+    ('timeout', '/w', lambda v: [str(int(v * 1000))]),
+    ('source', '/S', lambda v: [v]),
+    ('gateway', '/j', list),
+)
+_UNIX_FLAGS = (
+    ('max_hops', '-m', lambda v: [str(v)]),
+    ('no_resolve', '-n', None),
+    ('ipv4', '-4', None),
+    ('ipv6', '-6', None),
+    ('timeout', '-w', lambda v: [f"{v},3,10"]),
+    ('source', '-s', lambda v: [v]),
+    ('gateway', '-g', lambda v: [','.join(v)]),
+)
+
+_IS_WINDOWS: Optional[bool] = None # Resolved by _is_windows() on the first trace; the OS doesn't change while running
+
+def _is_windows() -> bool:
+    """Returns whether we run on Windows (tracert) rather than a unix (traceroute), looked up once."""
+    global _IS_WINDOWS
+    if _IS_WINDOWS is None:
+        import platform
+        _IS_WINDOWS = platform.system().lower() == 'windows'
+    return _IS_WINDOWS
+
+def _freeze(value: Any) -> Any:
+    """Makes a list argument hashable for use in a cache key."""
+    return tuple(value) if isinstance(value, list) else value
+
+def _trace_key(target: str, max_hops: Optional[int] = None, no_resolve: bool = False, ipv4: bool = True,
+               ipv6: bool = False, timeout: Optional[float] = None, source: Optional[str] = None,
+               gateway: Optional[Sequence[str]] = None) -> Hashable:
+    """Cache key for an iter_hops call (same parameters): all arguments in order, whether they were
+    passed positionally, by keyword or left at their default."""
+    return (target, max_hops, no_resolve, ipv4, ipv6, timeout, source, _freeze(gateway))
+
+def _ttl_cache(seconds: float, key: Callable[..., Hashable]) -> Callable[[Callable[..., Iterator[Hop]]], Callable[..., Iterator[Hop]]]:
+    """Caches the hops a generator yields per key(*args, **kwargs) for 'seconds'. A cache hit yields
+    the stored hops; a miss yields the generator's hops as they come and stores them once it is
+    exhausted. Nothing is stored when the generator raises, is not run to the end or yields no hops,
+    so a failed trace can be retried right away."""
+    def decorator(func: Callable[..., Iterator[Hop]]) -> Callable[..., Iterator[Hop]]:
+        cache: Dict[Hashable, Tuple[float, List[Hop]]] = {} # key -> (monotonic time stored, hops)
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Iterator[Hop]:
+            call_key = key(*args, **kwargs)
+            hit = cache.get(call_key)
+            if hit is not None and time.monotonic() - hit[0] < seconds:
+                yield from hit[1]
+                return
+            result = []
+            for hop in func(*args, **kwargs):
+                result.append(hop)
+                yield hop
+            if result:
+                now = time.monotonic() # Stored when the trace is complete, a slow trace still gets the full 'seconds'
+                # Drop expired entries, or every target ever traced would stay in memory. Trace threads share
+                # the cache: sweep a snapshot (list() copies it atomically) so another thread's insert can't break the loop
+                for stale, (stored, _) in list(cache.items()):
+                    if now - stored >= seconds:
+                        cache.pop(stale, None) # May already be gone, swept by another thread
+                cache[call_key] = (now, result)
+        wrapper.cache_clear = cache.clear # type: ignore[attr-defined]
+        return wrapper
+    return decorator
+
+def _make_hop(ip: Optional[str]) -> Hop:
+    """Builds the Hop for a matched hop line.
+    'ip' is the address token as matched; anything that isn't an IPv4/IPv6 address counts as no ip."""
+    import ipaddress # Only needed once a trace runs, like subprocess in iter_hops
+    if ip:
+        try:
+            ip = str(ipaddress.ip_address(ip)) # Normalized, e.g. IPv6 in its compressed form
+        except ValueError:
+            ip = None
+    return Hop(ip or None)
+
+def _reverse_dns(ip: str) -> Optional[str]:
+    """Returns the hostname 'ip' resolves to, or None."""
+    import socket
+    try:
+        return socket.gethostbyaddr(ip)[0]
+    except OSError: # No PTR record, resolver failure, ...
+        return None
+
+def _with_hostname(hop: Hop, lookup: "Optional[Future[Optional[str]]]") -> Hop:
+    """Returns 'hop' with the hostname found by its reverse 'lookup' (waiting for it), if any."""
+    hostname = lookup.result() if lookup is not None else None
+    return hop._replace(hostname=hostname) if hostname and hostname != hop.ip else hop
+
+@_ttl_cache(seconds=60, key=_trace_key) # Re-tracing the same target within a minute reuses the route instead of spawning the command again
+def iter_hops(target: str, max_hops: Optional[int] = None, no_resolve: bool = False, ipv4: bool = True,
+              ipv6: bool = False, timeout: Optional[float] = None, source: Optional[str] = None,
+              gateway: Optional[Sequence[str]] = None) -> Iterator[Hop]:
     """
-    Performs a network route trace to the target and returns the route in a unified format.
+    Performs a network route trace to the target and yields the route in a unified format while the
+    trace is still running, so the first hops can be used before the last ones are known.
 
     Args:
         target (str): The domain name or IP address to trace.
@@ -16,133 +140,101 @@ def trace_route(target, max_hops=None, no_resolve=False, ipv4=True, ipv6=False,
         source (str, optional): Source address for outgoing packets. Defaults to None.
         gateway (list, optional): List of gateways for loose source routing. Defaults to None.
 
-    Returns:
-        list: A list of hops, each hop is a list containing [ip] or [ip, hostname].
+    Yields:
+        Hop: One Hop(ip, hostname) per hop, in hop order. ip is None for a hop that did not answer
+            (those after the last answering hop are left out), hostname is None when it is unknown.
+
+    Raises:
+        RuntimeError: The trace command failed.
+
+    The hops of a complete trace are cached for a minute per argument set; a cached route is yielded
+    at once.
     """
-    os_name = platform.system().lower()
-    command = []
-
-    if os_name == 'windows':
-        command.append('tracert')
-        if max_hops is not None:
-            command.extend(['/h', str(max_hops)])
-        if no_resolve:
-            command.append('/d')
-        if ipv4:
-            command.append('/4')
-        if ipv6:
-            command.append('/6')
-        if timeout is not None:
-            command.extend(['/w', str(int(timeout * 1000))])
-        if source is not None:
-            command.extend(['/S', source])
-        if gateway is not None:
-            command.extend(['/j'] + gateway)
-        command.append(target)
-    else:
-        command.append('traceroute')
-        if max_hops is not None:
-            command.extend(['-m', str(max_hops)])
-        if no_resolve:
-            command.append('-n')
-        if ipv4:
-            command.append('-4')
-        if ipv6:
-            command.append('-6')
-        if timeout is not None:
-            command.extend(['-w', f"{timeout},3,10"])
-        if source is not None:
-            command.extend(['-s', source])
-        if gateway is not None:
-            command.extend(['-g', ','.join(gateway)])
-        command.append(target)
+    # Imported here rather than at module level: importing this module (e.g. for --help) stays cheap,
+    # the cost is only paid when a trace actually runs
+    import shutil
+    import subprocess
+    from concurrent.futures import ThreadPoolExecutor
+
+    is_windows = _is_windows()
+    # The trace itself always runs numeric: tracert/traceroute would reverse-resolve each hop serially
+    # while probing. Hostnames are looked up here instead, concurrently (see below).
+    options: Dict[str, Any] = {
+        'max_hops': max_hops, 'no_resolve': True, 'ipv4': ipv4, 'ipv6': ipv6,
+        'timeout': timeout, 'source': source, 'gateway': gateway,
+    }
+    tool = 'tracert' if is_windows else 'traceroute'
+    command = [shutil.which(tool) or tool] # Full path, see the Popen call below
+    for name, flag, fmt in (_WIN_FLAGS if is_windows else _UNIX_FLAGS):
+        value = options[name]
+        if fmt is None: # Switch, present when truthy
+            if value:
+                command.append(flag)
+        elif value is not None: # Option with value(s)
+            command.append(flag)
+            command.extend(fmt(value))
+    command.append(target)
 
+    hop_re = _WIN_HOP_RE if is_windows else _UNIX_HOP_RE
+
+    # On unix, subprocess launches through posix_spawn() instead of fork()+exec() (which copies this
+    # process's page tables, Tk and all) only when the executable is given by path and none of
+    # close_fds, pass_fds, preexec_fn, cwd, start_new_session or user/group changes are asked for.
+    # Keep it that way: close_fds=False is safe since Python opens its fds non-inheritable anyway.
+    spawn_options: Dict[str, Any] = {} if is_windows else {'close_fds': False}
+
+    # A hop's reverse lookup starts on the pool as soon as its line is parsed, overlapping with the
+    # rest of the trace and the other lookups; hops are yielded in order once their own lookup is done
+    pool = None if no_resolve else ThreadPoolExecutor(max_workers=16)
+    pending: Deque[Tuple[Hop, "Optional[Future[Optional[str]]]"]] = collections.deque()
+    unanswered = 0 # Hops without an answer since the last one that had; yielded only once a later hop answers
+    next_hop = 1 # Hop number expected on the next hop line
     try:
-        result = subprocess.run(command, capture_output=True, text=True, check=True)
-        output = result.stdout
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"Command failed: {e.stderr}")
-
-    hops = []
-    if os_name == 'windows':
-        for line in output.split('\n'):
-            line = line.strip()
-            hop_match = re.match(r'^\s*(\d+)\s+', line)
-            if not hop_match:
-                continue
-            parts = line.split()
-            current_index = 1
-            entries_processed = 0
-
-            # Process three timing entries (each can be "*" or "X ms")
-            while entries_processed < 3 and current_index < len(parts):
-                if parts[current_index] == '*':
-                    current_index += 1
-                    entries_processed += 1
-                elif current_index + 1 < len(parts) and parts[current_index + 1].lower() == 'ms':
-                    current_index += 2
-                    entries_processed += 1
-                else:
-                    break
-
-            if entries_processed < 3:
-                continue
-
-            host_ip_part = ' '.join(parts[current_index:])
-            ip = None
-            hostname = None
-
-            # Extract IP within brackets
-            ip_match = re.search(r'\[(\d+\.\d+\.\d+\.\d+)\]$', host_ip_part)
-            if ip_match:
-                ip = ip_match.group(1)
-                hostname = host_ip_part[:ip_match.start()].strip()
-                # Clean hostname by removing residual timing parts (e.g., "ms")
-                hostname = re.sub(r'\s*\d+ms\s*|\s*ms\s*', '', hostname, flags=re.IGNORECASE).strip()
-                if not hostname:
-                    hostname = None
-            else:
-                # Extract standalone IP
-                ip_match = re.search(r'(\d+\.\d+\.\d+\.\d+)$', host_ip_part)
-                if ip_match:
-                    ip = ip_match.group(1)
-                    hostname_part = host_ip_part[:ip_match.start()].strip()
-                    hostname = re.sub(r'\s*\d+ms\s*|\s*ms\s*', '', hostname_part, flags=re.IGNORECASE).strip()
-                    if not hostname or hostname == ip:
-                        hostname = None
-
-            # Check if IP is valid, if not, set to None
-            if ip:
-                if hostname:
-                    hops.append([ip, hostname])
-                else:
-                    hops.append([ip])
-            else:
-                hops.append([None])
-    else:
-        for line in output.split('\n'):
-            line = line.strip()
-            hop_match = re.match(r'^\s*(\d+)\s+', line)
-            if not hop_match:
-                continue
-            ip = None
-            hostname = None
-            host_ip_match = re.search(r'([^\(\s]+)\s+\((\d+\.\d+\.\d+\.\d+)\)', line)
-            if host_ip_match:
-                hostname = host_ip_match.group(1)
-                ip = host_ip_match.group(2)
-                if hostname == ip:
-                    hostname = None
-            else:
-                ip_match = re.search(r'\b(\d+\.\d+\.\d+\.\d+)\b', line)
-                if ip_match:
-                    ip = ip_match.group(1)
-            if ip:
-                if hostname:
-                    hops.append([ip, hostname])
-                else:
-                    hops.append([ip])
-            else:
-                hops.append([None])
-
-    return hops
+        # Parse the output line by line while the trace is still running, instead of buffering all of it
+        # until the command exits
+        with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1,
+                              **spawn_options) as proc:
+            assert proc.stdout is not None and proc.stderr is not None # Both are PIPEs
+            for line in proc.stdout:
+                # Only hop lines match (not the header, blank or 'Trace complete.' lines)
+                m = hop_re.match(line)
+                if not m:
+                    continue
+                hop = _make_hop(m['ip'])
+                number = int(m['hop'])
+                if number < next_hop: # Repeated hop number, the first line for it counts
+                    continue
+                unanswered += number - next_hop # Hop numbers the tool skipped did not answer either
+                next_hop = number + 1
+                if hop.ip is None:
+                    unanswered += 1
+                    continue
+
+                pending.extend((Hop(None), None) for _ in range(unanswered))
+                unanswered = 0
+                pending.append((hop, pool.submit(_reverse_dns, hop.ip) if pool else None))
+                while pending and (pending[0][1] is None or pending[0][1].done()):
+                    yield _with_hostname(*pending.popleft())
+            stderr = proc.stderr.read()
+        # Leaving the 'with' waited for the process, so returncode is set
+        if proc.returncode != 0:
+            raise RuntimeError(f"Command failed: {stderr}")
+
+        while pending:
+            yield _with_hostname(*pending.popleft())
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+def trace_route(target: str, max_hops: Optional[int] = None, no_resolve: bool = False, ipv4: bool = True,
+                ipv6: bool = False, timeout: Optional[float] = None, source: Optional[str] = None,
+                gateway: Optional[Sequence[str]] = None) -> List[Hop]:
+    """
+    Performs a network route trace to the target and returns the whole route once the trace is done.
+    Takes the same arguments as iter_hops.
+
+    Returns:
+        list: The Hop(ip, hostname) tuples iter_hops yields, in hop order.
+    """
+    return list(iter_hops(target, max_hops=max_hops, no_resolve=no_resolve, ipv4=ipv4, ipv6=ipv6,
+                          timeout=timeout, source=source, gateway=gateway))